@@ -0,0 +1,170 @@
+"""Process-wide admission control for model calls.
+
+Every model call first takes one of a limited number of slots. When all slots
+are busy, calls wait in a bounded queue that is served by priority class
+(Standard Mode before Council / cover letters before background work) and,
+within a class, round-robin across sessions, so one visitor firing many calls
+cannot starve the others. A full queue turns calls away at once (backpressure)
+instead of letting them pile up into a 429 storm.
+
+The number of slots adapts: an overloaded call (every key rate-limited) halves
+it, down to min_concurrent, and it grows back by one after that many calls in
+a row went through without overload.
+"""
+import itertools
+import threading
+import time
+from collections import Counter
+
+BUSY_MESSAGE = "Error: The assistant is busy right now. Please try again in a minute."
+
+PRIORITY_INTERACTIVE, PRIORITY_HEAVY, PRIORITY_BACKGROUND = 0, 1, 2
+# Sessions remembered for round-robin order; a forgotten one simply counts as never served
+SERVED_HISTORY = 1024
+
+
+class Ticket:
+    def __init__(self, seq, session_id, priority, on_position=None):
+        self.seq = seq
+        self.session_id = session_id
+        self.priority = priority
+        self.on_position = on_position
+        self.position = None
+        self.admitted = False
+        self.enqueued_at = time.monotonic()
+        self.admitted_at = None
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent, min_concurrent=1, max_queue=64, max_queue_per_session=4, max_wait=60.0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.min_concurrent = max(1, min(min_concurrent, self.max_concurrent))
+        self.limit = self.max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_per_session = max_queue_per_session
+        self.max_wait = max_wait
+        self.counters = Counter()
+        self._active = 0
+        self._healthy_streak = 0
+        self._waiting = []  # tickets in arrival order
+        self._served = {}  # session_id -> seq of its last admission (round-robin order)
+        self._seq = itertools.count()
+        self._wait_total = 0.0
+        self._cond = threading.Condition()
+
+    # --- Scheduling ---
+
+    def _order(self):
+        """Waiting tickets in the order they would be admitted."""
+        pending = list(self._waiting)
+        served = dict(self._served)
+        stamps = itertools.count(max(served.values(), default=0) + 1)
+        order = []
+        while pending:
+            # Best class first; then the session served longest ago; then arrival
+            ticket = min(pending, key=lambda t: (t.priority, served.get(t.session_id, -1), t.seq))
+            pending.remove(ticket)
+            served[ticket.session_id] = next(stamps)
+            order.append(ticket)
+        return order
+
+    def _publish_positions(self):
+        for position, ticket in enumerate(self._order(), start=1):
+            if ticket.position != position:
+                ticket.position = position
+                if ticket.on_position:
+                    ticket.on_position(position)
+
+    def _dispatch(self):
+        admitted = False
+        while self._waiting and self._active < self.limit:
+            ticket = self._order()[0]
+            self._waiting.remove(ticket)
+            self._admit(ticket)
+            admitted = True
+        if admitted:
+            self._publish_positions()
+            self._cond.notify_all()
+
+    def _admit(self, ticket):
+        ticket.admitted = True
+        ticket.admitted_at = time.monotonic()
+        ticket.position = None
+        if ticket.on_position:
+            ticket.on_position(None)
+        self._active += 1
+        # Re-inserted so the dict stays in service order and the longest-idle session can be dropped
+        self._served.pop(ticket.session_id, None)
+        self._served[ticket.session_id] = next(self._seq)
+        if len(self._served) > SERVED_HISTORY:
+            del self._served[next(iter(self._served))]
+        self._wait_total += ticket.admitted_at - ticket.enqueued_at
+        self.counters["admitted"] += 1
+
+    # --- Public API ---
+
+    def acquire(self, session_id, priority=PRIORITY_HEAVY, cancel=None, on_position=None):
+        """Waits for a slot. Returns a Ticket to release(), or None if the call is turned away.
+
+        None means the queue (or, for a visitor's call, the session's share of it) was full, the call
+        waited max_wait seconds, or the cancel event was set while waiting.
+        on_position(n) is called with the queue position while waiting and None once admitted.
+        """
+        with self._cond:
+            ticket = Ticket(next(self._seq), session_id, priority, on_position)
+            if not self._waiting and self._active < self.limit:
+                self._admit(ticket)
+                return ticket
+            # Background work (warm-up, batch rows) shares one session and is already bounded
+            # by its own worker pools, so only visitors are held to a per-session share
+            mine = sum(1 for t in self._waiting if t.session_id == session_id)
+            capped = priority < PRIORITY_BACKGROUND and mine >= self.max_queue_per_session
+            if len(self._waiting) >= self.max_queue or capped:
+                self.counters["rejected"] += 1
+                return None
+            self._waiting.append(ticket)
+            self.counters["queued"] += 1
+            self._publish_positions()
+
+            deadline = time.monotonic() + self.max_wait
+            while not ticket.admitted:
+                remaining = deadline - time.monotonic()
+                cancelled = cancel is not None and cancel.is_set()
+                if cancelled or remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self.counters["cancelled" if cancelled else "timed_out"] += 1
+                    self._publish_positions()
+                    if on_position:
+                        on_position(None)
+                    return None
+                # Woken by every admission; the timeout only bounds how late a cancel is seen
+                self._cond.wait(min(remaining, 0.5))
+            return ticket
+
+    def release(self, ticket, overloaded=False):
+        """Frees the slot. overloaded=True (the call found every key rate-limited) shrinks the limit."""
+        with self._cond:
+            self._active -= 1
+            if overloaded:
+                self._healthy_streak = 0
+                shrunk = max(self.min_concurrent, self.limit // 2)
+                if shrunk < self.limit:
+                    self.limit = shrunk
+                    self.counters["limit_decreases"] += 1
+            else:
+                self._healthy_streak += 1
+                if self._healthy_streak >= self.limit and self.limit < self.max_concurrent:
+                    self.limit += 1
+                    self._healthy_streak = 0
+            self._dispatch()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self.counters)
+            stats["active"] = self._active
+            stats["limit"] = self.limit
+            stats["waiting"] = len(self._waiting)
+            stats["waiting_sessions"] = len({t.session_id for t in self._waiting})
+            admitted = stats.get("admitted", 0)
+            stats["avg_wait_s"] = round(self._wait_total / admitted, 3) if admitted else 0.0
+        return stats
@@ -1,133 +1,520 @@
 import streamlit as st
-import google.generativeai as genai
 import json
-import pandas as pd
-import plotly.express as px
-from google.api_core import exceptions
 import os
-import random
 import time
+import hashlib
+import threading
+import uuid
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from retrieval import CVIndex
+from response_cache import ResponseCache
+from question_cache import SimilarQuestionCache
+from precompute import PrecomputedAnswers, warm_up, is_error_response
+from scheduler import KeyScheduler
+from llm import LLMGateway
+from client_pool import ClientPool
+from memory import ConversationMemory, new_memory_state
+from metrics import MetricsRegistry, RerunStats
+from router import QueryRouter, ROUTING_OPTIONS, ROUTE_AUTO
+from skills_chart import build_figure, load_static_chart
+from code_vault import CodeVault
+from trace_store import TraceStore, new_trace_log, page_of
+from session_store import SessionStore
+from batch_jobs import BatchRunner, parse_applications
+from skill_matcher import SkillMatcher
+from claim_verifier import ClaimVerifier
+from knowledge_base import KnowledgeBase
+from task_engine import TaskEngine, CANCELLED, DONE, current_cancel, current_task
+from admission import AdmissionController, PRIORITY_INTERACTIVE, PRIORITY_HEAVY, PRIORITY_BACKGROUND
+from context_cache import CachedPrompt, ContextCache, GeminiContextBackend, KnowledgePrefix, LocalContextBackend, prompt_text
+from prompts import (
+    TONE_OPTIONS, COUNCIL_PRESETS, QUICK_INSIGHTS,
+    build_standard_prompt, build_summary_prompt, build_draft_prompt, build_audit_prompt, build_cover_letter_prompt,
+    build_correction_prompt, build_knowledge_prefix, build_tone_prompt,
+)
+
 
 MODEL_POOL = [
     'gemini-flash-latest',
     'gemini-2.5-flash-lite'
 ]
 
+# Routing: short lookup questions try the lite model first, synthesis (Auditor,
+# cover letters, open-ended questions) the full model. Both fall back to the other.
+ROUTER_FAST_MODEL = 'gemini-2.5-flash-lite'
+ROUTER_STRONG_MODEL = 'gemini-flash-latest'
+
+# Retrieval: only the most relevant CV sections are sent with each prompt.
+# Set RETRIEVAL_TOKEN_BUDGET = None to always send the full CV.
+RETRIEVAL_TOP_K = 5
+RETRIEVAL_TOKEN_BUDGET = 800
+
+# Response cache: identical prompts are answered from memory / disk instead of the API.
+# Calls hotter than CACHE_MAX_TEMPERATURE are meant to vary, so they skip the cache.
+CACHE_DB_PATH = ".cache/response_cache.sqlite3"
+CACHE_MAX_TEMPERATURE = 0.8
+CACHE_TTL_SECONDS = 24 * 3600
+# Context caching: the full CV (plus the shared role instructions) is stored provider-side once
+# per key/model and prompts only send the per-request part; handles are re-created on expiry or
+# CV change. "gemini" uses the cached-content API, "local" an offline stand-in, None sends everything inline.
+CONTEXT_CACHE_BACKEND = "gemini"
+CONTEXT_CACHE_TTL_SECONDS = 3600
+CONTEXT_CACHE_REFRESH_SECONDS = 120
+# Free-text questions that are near-duplicates of an earlier one (same mode, tone and CV)
+# reuse its answer. Similarity is cosine over character trigrams; None disables it.
+SIMILAR_QUESTION_THRESHOLD = 0.85
+SIMILAR_QUESTION_MAX_ENTRIES = 2000
+
+# Hedging: if a call has not answered (or streamed its first token) by the observed
+# HEDGE_PERCENTILE latency, a backup request goes to another key/model and the first
+# one wins. Backups are capped at HEDGE_MAX_RATIO of all calls.
+HEDGE_ENABLED = True
+HEDGE_PERCENTILE = 0.95
+HEDGE_DEFAULT_DELAY_SECONDS = 4.0
+HEDGE_MAX_RATIO = 0.1
+# Hedging worker threads per admitted call: room for its primary, a backup and a loser still on the wire
+HEDGE_WORKERS_PER_CALL = 3
+
+# Background tasks: model calls run on a process-wide pool of TASK_WORKERS threads while the page
+# polls every TASK_POLL_SECONDS. A new request in a tab cancels the one still running there, and
+# the tasks of a session that stopped polling for TASK_ABANDON_SECONDS (tab closed) are cancelled.
+TASK_WORKERS = 16
+TASK_POLL_SECONDS = 0.5
+TASK_ABANDON_SECONDS = 90
+# One task slot per tab (so tabs run side by side) -> title of its progress view
+TASK_TITLES = {
+    "council": "The Council is convened...",
+    "standard": "Thinking...",
+    "cover_letter": "Writing your cover letter...",
+}
+
+# Admission control: at most ADMISSION_CONCURRENCY_PER_KEY model calls per API key are in flight
+# across all visitors (fewer while calls find every key rate-limited). The rest wait up to
+# ADMISSION_MAX_WAIT_SECONDS in one queue of ADMISSION_MAX_QUEUE calls, at most
+# ADMISSION_MAX_QUEUE_PER_SESSION per visitor, served round-robin across visitors; beyond that
+# a call is answered "busy" right away. Standard Mode goes first, warm-up / batch work last.
+ADMISSION_CONCURRENCY_PER_KEY = 4
+ADMISSION_MAX_QUEUE = 64
+ADMISSION_MAX_QUEUE_PER_SESSION = 6
+ADMISSION_MAX_WAIT_SECONDS = 60
+ADMISSION_PRIORITIES = {"standard": PRIORITY_INTERACTIVE, "summary": PRIORITY_INTERACTIVE}
+
+# Instrumentation: one JSON line per LLM attempt / cache hit
+METRICS_LOG_PATH = ".cache/llm_calls.jsonl"
+
+# Standard Mode memory: recent turns verbatim within this budget, older turns summarized
+HISTORY_TOKEN_BUDGET = 600
+
+# Council ensemble: number of Visionary drafts generated in parallel per question
+COUNCIL_DRAFTS = 3
+# Claim check: drafts are fact-checked locally (GPA, grades, graduation, tech, projects) first.
+# A draft with at least CLAIM_CHECK_MIN_VERIFIED claims checked against a CV value (GPA, grades,
+# graduation, project tech) and none flagged only gets a tone rewrite instead of the Auditor call;
+# otherwise the Auditor only fixes the flagged claims (including employers, team sizes and awards).
+CLAIM_CHECK_ENABLED = True
+CLAIM_CHECK_MIN_VERIFIED = 2
+
+# Key/model scheduler: per-pair request budget, 429 cool-down and circuit breaker
+KEY_MODEL_RPM = 10
+KEY_MODEL_BURST = 3
+RATE_LIMIT_COOLDOWN_SECONDS = 60
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_OPEN_SECONDS = 120
+
+# Warm-up: answers for the canned buttons are generated in the background at startup
+PRECOMPUTE_ENABLED = True
+PRECOMPUTE_DIR = ".cache"
+
+# Rerun budget: every script run should finish within this (same budget as the
+# benchmark's --rerun-budget-ms); overruns are counted in the Architect View
+RERUN_BUDGET_SECONDS = 0.15
+
+CV_PDF_PATH = "kaan_degirmenci_cv.pdf"
+# The CV as JSON; edits are picked up on the next rerun, no restart needed
+KNOWLEDGE_BASE_PATH = "knowledge_base.json"
+
+# Skills chart: a pre-rendered SVG (no pandas / Plotly import at all) or the
+# interactive Plotly figure. Pre-build the SVG with `python skills_chart.py`.
+SKILLS_CHART_STATIC = True
+
+# Code Vault: label -> (path, language); long files are shown one section or page at a time
+CODE_VAULT_FILES = {
+    "SUMO Traffic Wrapper (Java)": ("SimulationManager.java", "java"),
+    "IoT Handler (C++)": ("IoTcode/IoTcode.ino", "c++"),
+    "ChatBot(Python)": ("app_display.py", "python"),
+}
+CODE_VAULT_PAGE_SIZE = 80
+
+# Decision traces: the last TRACE_MAX_ENTRIES per session stay in memory and the sidebar
+# shows TRACE_PAGE_SIZE per page. With TRACE_DB_PATH set (e.g. ".cache/traces.sqlite3"),
+# every trace, including the visitor's question, is also written to SQLite on disk and
+# older pages are read from there; None keeps traces in memory only.
+TRACE_MAX_ENTRIES = 20
+TRACE_PAGE_SIZE = 3
+TRACE_DB_PATH = None
+TRACE_RETENTION_SECONDS = 7 * 24 * 3600
+
+# Session memory: chat turns beyond SESSION_MEMORY_BUDGET_BYTES per session (or beyond a fair
+# share of GLOBAL_MEMORY_BUDGET_BYTES under load) are spilled to SQLite and paged back on
+# request. Sessions idle for SESSION_IDLE_SECONDS are spilled entirely. Spilled turns (user
+# questions included) are kept on disk for SESSION_SPILL_RETENTION_SECONDS. None disables spilling.
+SESSION_DB_PATH = ".cache/sessions.sqlite3"
+SESSION_MEMORY_BUDGET_BYTES = 256 * 1024
+GLOBAL_MEMORY_BUDGET_BYTES = 64 * 1024 * 1024
+SESSION_IDLE_SECONDS = 30 * 60
+SESSION_SPILL_RETENTION_SECONDS = 7 * 24 * 3600
+SPILL_PAGE_SIZE = 10
+
+# Batch cover letters: rows of an uploaded CSV / JSON file are generated by a background pool
+# with BATCH_WORKERS_PER_KEY workers per API key (the scheduler still paces every key).
+# Finished rows are saved under BATCH_DIR, so a failed or interrupted batch can be resumed.
+BATCH_DIR = ".cache/batches"
+BATCH_WORKERS_PER_KEY = 2
+BATCH_MAX_WORKERS = 16
+BATCH_MAX_ROWS = 200
+BATCH_MAX_ATTEMPTS = 3
+BATCH_RETRY_DELAY_SECONDS = 5.0
+BATCH_POLL_SECONDS = 2
+
 # --- 1. CONFIG & SETUP ---
 st.set_page_config(page_title="Digital Intern Kaan", layout="wide")
+rerun_started = time.perf_counter()
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "history_council" not in st.session_state:
     st.session_state.history_council = []
 if "council_logs" not in st.session_state:
-    st.session_state.council_logs = []
+    st.session_state.council_logs = new_trace_log(TRACE_MAX_ENTRIES)
+if "trace_next_id" not in st.session_state:
+    st.session_state.trace_next_id = len(st.session_state.council_logs) + 1
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "chat_memory" not in st.session_state:
+    st.session_state.chat_memory = new_memory_state()
 
 # --- 2. DATA (CV) - Shared ---
-cv_data = {
-    "personal_info": {
-        "name": "Kaan Degirmenci",
-        "role": "Computer Science Student & Future System Architect",
-        "contact": "kaandeg@gmail.com | https://www.linkedin.com/in/kaan-degirmenci-23a5a03a4/",
-        "summary": "Forward-thinking Computer Science student transitioning from a 'Coder' to a 'Solutions Architect'. . Skilled in bridging the gap between low-level hardware (Assembly/C) and high-level data architecture (SQL/AI)."
-    },
-    "education": {
-        "university": "Frankfurt University of Applied Sciences",
-        "degree": "B.Sc. Computer Science (Informatik)",
-        "current_status": "Final Year Student | Expected Graduation: Summer 2026",
-        "gpa": "2.4 (German Grading Scale)",
-        "key_coursework_grades": {
-            "Introduction to Programming with C": "1.0",
-            "Object Oriented Programming with Java" : "1.3",
-            "Computer Architecture (Assembly & Hardware-Software Interface)": "3.3",
-            "Databases (SQL)": "2.3",
-            "Probability and Statistics (Data Analysis with R)": "2.7",
-            "Object Oriented Programming with C++": "1.7",
-            "Real-time Systems": "1.7",
-            "Artificial Intelligence": "2.3",
-            "Software Engineering Analysis": "Current Focus: System Architecture",
-            "IoT Sensorik": "1.7"
-        }
-    },
-    "technical_skills": {
-        "core_philosophy": ["System Architecture", "First-Principles AI", "Object-Oriented Design"],
-        "programming_languages": ["Java (Advanced)", "Python (AI/ML Focus)", "C++ (Embedded)", "SQL", "R (Statistical Data Analysis)", "JavaScript"],
-        "ai_ml_knowledge": [
-            "Deep Learning Architecture: CNNs (Conv2D, Pooling), Backpropagation, Optimizers (Adam/SGD)",
-            "Reinforcement Learning Logic: Understanding Agent-Environment interaction, Markov Decision Processes (MDP), and Delayed Rewards (Long-term Strategy vs. Short-term Penalty)",
-            "Unsupervised Strategy: K-Means Clustering (Optimizing 'k' via Elbow Method, Inertia & Silhouette Score)",
-            "Supervised Logic: Multi-class Classification (Softmax) vs. Binary (Sigmoid), Decision Tree, Random Forest",
-            "Math Foundation: Linear Algebra (Matrix Operations), Calculus (Gradients)"
-        ]
-    },
-    "projects": [
+@st.cache_resource
+def get_knowledge_base():
+    return KnowledgeBase(KNOWLEDGE_BASE_PATH)
+
+# Re-read only when the file changed. cv_version (a hash of cv_text) keys every artifact
+# derived from the CV, so an edit rebuilds those on the next rerun without a restart.
+try:
+    cv_data, cv_text, cv_version = get_knowledge_base().snapshot()
+except (OSError, ValueError) as e:
+    st.error(f"The knowledge base ({KNOWLEDGE_BASE_PATH}) could not be loaded: {e}")
+    st.stop()
+
+@st.cache_resource(max_entries=2)
+def get_cv_index(version, _source_text):
+    # Built once per process and CV version (underscore arguments are not hashed)
+    return CVIndex(json.loads(_source_text))
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(CACHE_DB_PATH, ttl_seconds=CACHE_TTL_SECONDS)
+
+@st.cache_resource
+def get_question_cache():
+    # The candidate's name says nothing about what is asked ("Kaan GPA?" == "his GPA")
+    return SimilarQuestionCache(
+        SIMILAR_QUESTION_THRESHOLD,
+        max_entries=SIMILAR_QUESTION_MAX_ENTRIES,
+        extra_stopwords=cv_data["personal_info"]["name"].split(),
+    )
+
+def get_grounding(question):
+    """Hash of the CV the answer to question was based on: it stays valid while this does.
+
+    That is the sections retrieved for the question, plus, behind a cached prefix
+    (where the model reads the whole CV), the prefix version.
+    """
+    grounding = get_cv_context(question)
+    if get_context_cache() is not None:
+        grounding = get_knowledge_prefix(cv_version, cv_text).version + grounding
+    return hashlib.sha256(grounding.encode("utf-8")).hexdigest()[:12]
+
+def find_similar_answer(question, mode, tone):
+    if not SIMILAR_QUESTION_THRESHOLD:
+        return None
+    return get_question_cache().lookup(question, mode, tone, get_grounding)
+
+def remember_answer(question, mode, tone, answer):
+    if SIMILAR_QUESTION_THRESHOLD:
+        get_question_cache().store(question, mode, tone, get_grounding, answer)
+
+@st.cache_resource
+def get_key_scheduler(api_keys):
+    # One scheduler per process, shared by every session and worker thread
+    return KeyScheduler(
+        api_keys, MODEL_POOL,
+        rpm=KEY_MODEL_RPM,
+        burst=KEY_MODEL_BURST,
+        cooldown_seconds=RATE_LIMIT_COOLDOWN_SECONDS,
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        circuit_seconds=CIRCUIT_OPEN_SECONDS,
+    )
+
+@st.cache_resource
+def get_metrics():
+    return MetricsRegistry(METRICS_LOG_PATH)
+
+@st.cache_resource
+def get_client_pool():
+    return ClientPool()
+
+@st.cache_resource
+def get_task_engine():
+    return TaskEngine(workers=TASK_WORKERS, abandon_seconds=TASK_ABANDON_SECONDS)
+
+@st.cache_resource
+def get_query_router():
+    return QueryRouter(MODEL_POOL, ROUTER_FAST_MODEL, ROUTER_STRONG_MODEL)
+
+@st.cache_resource
+def get_context_cache():
+    if CONTEXT_CACHE_BACKEND == "gemini":
+        backend = GeminiContextBackend()
+    elif CONTEXT_CACHE_BACKEND == "local":
+        backend = LocalContextBackend()
+    else:
+        return None
+    return ContextCache(backend, ttl_seconds=CONTEXT_CACHE_TTL_SECONDS, refresh_margin_seconds=CONTEXT_CACHE_REFRESH_SECONDS)
+
+@st.cache_resource(max_entries=2)
+def get_knowledge_prefix(version, _source_text):
+    # A CV change yields a new prefix version, so provider caches are re-created
+    instruction, text = build_knowledge_prefix(json.loads(_source_text)['personal_info']['name'], _source_text)
+    return KnowledgePrefix(text, instruction)
+
+def cv_prompt(build, context, cached_context=None, cv=None):
+    """build(context) -> prompt text.
+
+    With context caching on, the request can also go out as a short suffix
+    (built with cached_context) behind the cached CV prefix. cv is a
+    (version, text) snapshot; None means the one this script run loaded.
+    """
+    inline = build(context)
+    if get_context_cache() is None:
+        return inline
+    version, text = cv or (cv_version, cv_text)
+    return CachedPrompt(get_knowledge_prefix(version, text), build(cached_context), inline)
+
+def get_api_keys():
+    if "api_keys" in st.secrets:
+        return tuple(st.secrets["api_keys"])
+    st.error("API Key not founded. Please check the secrets settings..")
+    return ()
+
+@st.cache_resource
+def get_admission_controller(api_keys):
+    keys = max(1, len(api_keys))
+    return AdmissionController(
+        ADMISSION_CONCURRENCY_PER_KEY * keys,
+        min_concurrent=keys,
+        max_queue=ADMISSION_MAX_QUEUE,
+        max_queue_per_session=ADMISSION_MAX_QUEUE_PER_SESSION,
+        max_wait=ADMISSION_MAX_WAIT_SECONDS,
+    )
+
+@st.cache_resource
+def build_llm_gateway(api_keys):
+    return LLMGateway(
+        get_key_scheduler(api_keys),
+        get_client_pool(),
+        cache=get_response_cache(),
+        cache_max_temperature=CACHE_MAX_TEMPERATURE,
+        metrics=get_metrics(),
+        hedge=HEDGE_ENABLED,
+        hedge_percentile=HEDGE_PERCENTILE,
+        hedge_default_delay=HEDGE_DEFAULT_DELAY_SECONDS,
+        hedge_max_ratio=HEDGE_MAX_RATIO,
+        hedge_workers=HEDGE_WORKERS_PER_CALL * get_admission_controller(api_keys).max_concurrent,
+        context_cache=get_context_cache(),
+        admission=get_admission_controller(api_keys),
+    )
+
+def get_llm_gateway():
+    return build_llm_gateway(get_api_keys())
+
+def get_cv_context(query, cv=None):
+    version, text = cv or (cv_version, cv_text)
+    return get_cv_index(version, text).build_context(query, top_k=RETRIEVAL_TOP_K, token_budget=RETRIEVAL_TOKEN_BUDGET)
+
+@st.cache_resource(max_entries=2)
+def get_skill_matcher(version, _source_text):
+    return SkillMatcher(json.loads(_source_text))
+
+def render_skill_match(match):
+    score = match.score()
+    if score is None:
+        st.caption("No known skills recognized in the job description yet.")
+        return
+    st.markdown(f"**CV match: {score}%** ({len(match.matched)} of {len(match.requirements)} requirements backed by the CV)")
+    with st.expander("Match breakdown"):
+        for item in match.breakdown():
+            kind = "required" if item["required"] else "nice to have"
+            mark = "✅" if item["evidence"] else "❌"
+            evidence = "".join(f"\n  - {source}" for source in item["evidence"])
+            st.markdown(f"- {mark} **{item['skill']}** ({kind}){evidence}")
+
+@st.cache_resource
+def get_trace_store():
+    if not TRACE_DB_PATH:
+        return None
+    store = TraceStore(TRACE_DB_PATH)
+    store.prune(TRACE_RETENTION_SECONDS)
+    return store
+
+@st.cache_resource
+def get_session_store():
+    if not SESSION_DB_PATH:
+        return None
+    store = SessionStore(
+        SESSION_DB_PATH,
+        session_budget_bytes=SESSION_MEMORY_BUDGET_BYTES,
+        global_budget_bytes=GLOBAL_MEMORY_BUDGET_BYTES,
+        idle_seconds=SESSION_IDLE_SECONDS,
+    )
+    store.prune(SESSION_SPILL_RETENTION_SECONDS)
+    return store
+
+def enforce_session_budget():
+    store = get_session_store()
+    if store is None:
+        return
+    memory_state = st.session_state.chat_memory
+
+    def on_spill(stream, count):
+        # The memory state indexes into the in-memory message list
+        if stream == "messages":
+            memory_state["summarized_upto"] = max(0, memory_state["summarized_upto"] - count)
+
+    store.enforce(
+        st.session_state.session_id,
         {
-            "name": "Advanced Traffic Simulation Wrapper (SUMO)",
-            "tech_stack": "Java (OOP), GUI Framework (Swing/JavaFX), SUMO Engine",
-            "link": "https://github.com/kaanbabaa/SUMO",
-            "details": "Engineered a robust Java wrapper for the SUMO (Simulation of Urban MObility) engine using strict Object-Oriented principles. Developed a dynamic GUI to visualize real-time traffic data, implementing multi-threading to ensure the simulation loop ran asynchronously without freezing the user interface. Focused on parsing complex XML configuration files to control vehicle behaviors programmatically."
+            "messages": st.session_state.messages,
+            "history_council": st.session_state.history_council,
+            "council_logs": st.session_state.council_logs,
         },
-        {
-            "name": "Machine Learning & Computer Vision Fundamentals",
-            "tech_stack": "Python, NumPy, Custom Neural Networks",
-            "details": "Developed scalable CNN architectures for Multi-class Classification (CIFAR-10 Vehicles, MNIST Digits). Distinguished by a 'Glass Box' approach: Applied deep theoretical knowledge of the underlying mathematics (Chain Rule for Backpropagation, Matrix Operations) to fine-tune 'Black Box' model parameters. utilized Kaggle datasets with rigorous Train/Test splitting to validate model generalization and mitigate overfitting."},
-        {
-            "name": "Smart Trash Bin (IoT System)",
-            "tech_stack": "C++, ESP8266, Firebase, Google Apps Script",
-            "details": "Designed an end-to-end IoT architecture connecting physical hardware to the cloud. Programmed an ESP8266 microcontroller to read distance data from an HC-SR04 sensor. Solved hardware limitations by implementing a software-side 'Signal Smoothing Algorithm' to filter out sensor noise/fluctuations. Established a WebSocket connection to Firebase for real-time status updates on a web dashboard."        },
-        {
-            "name": "AI Powered CV Assistant (RAG App)",
-            "tech_stack": "Python, Gemini API, Streamlit",
-            "details": "Developed a 'Chat with Data' application acting as a proof-of-concept for RAG (Retrieval Augmented Generation) systems. Implemented a Multi-Agent architecture ('Visionary' vs 'Auditor') to reduce AI hallucinations. Used Streamlit Session State for memory management and designed a modular prompt engineering structure to switch between 'Professional' and 'Creative' modes dynamically."
-        }
-    ],
-    "internship_expectations": "Seeking a challenging Summer 2026 Internship that bridges the gap between Low-Level Engineering (Embedded/IoT) and High-Level Software Architecture (AI/Cloud). I am eager to move beyond simple task execution and contribute to scalable system designs, applying my 'T-Shaped' skills in Object-Oriented Design and Data Logic to solve real-world engineering problems."
-}
+        # Only turns already folded into the summary may leave memory; traces are capped separately
+        limits={"messages": memory_state["summarized_upto"], "council_logs": 0},
+        on_spill=on_spill,
+    )
 
-cv_text = json.dumps(cv_data, indent=2)
+def render_earlier_messages(stream):
+    """'Load earlier messages' for spilled turns; they are read back only when asked for."""
+    store = get_session_store()
+    spilled = store.spilled_count(st.session_state.session_id, stream) if store else 0
+    if not spilled:
+        return
+    shown_key = f"{stream}_earlier_shown"
 
+    def show_more():
+        st.session_state[shown_key] = min(spilled, st.session_state.get(shown_key, 0) + SPILL_PAGE_SIZE)
+
+    shown = st.session_state.get(shown_key, 0)
+    if shown < spilled:
+        st.button(f"Load earlier messages ({spilled - shown} more)", key=f"{stream}_load_earlier", on_click=show_more)
+    for msg in store.load_recent(st.session_state.session_id, stream, shown):
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+
+@st.cache_resource
+def get_rerun_stats():
+    return RerunStats(RERUN_BUDGET_SECONDS)
+
+@st.cache_data
+def load_cv_pdf(path, modified_at):
+    # modified_at only keys the cache, so a replaced PDF is read again
+    with open(path, "rb") as f:
+        return f.read()
+
+@st.cache_resource
 def plot_skills():
-    # Data derived from 'technical_skills'
-    data = pd.DataFrame({
-        'Skill': ['System Architecture', 'Java (OOP/GUI)', 'C++(OOP)', 'Python (AI Math/Logic)', 'IoT/Embedded', 'Cloud/Backend'],
-        'Proficiency': [7, 9, 8, 8, 7, 7]  # Self-assessed scores (1-10)
-    })
-    
-    fig = px.line_polar(data, r='Proficiency', theta='Skill', line_close=True)
-    fig.update_traces(fill='toself', line_color='#4CAF50') 
-    fig.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, 10])),
-        showlegend=False,
-        title="Technical Balance: Architect vs. Coder"
-    )
-    return fig
+    # Built once per process; pandas + Plotly Express are only imported here
+    return build_figure()
+
+@st.cache_resource
+def get_static_skills_chart():
+    return load_static_chart(directory=PRECOMPUTE_DIR)
+
+enforce_session_budget()
 
 with st.sidebar:
     st.header("Configuration")
     
     # Download CV PDF
     try:
-        with open("kaan_degirmenci_cv.pdf", "rb") as pdf_file:
-            PDFbyte = pdf_file.read()
-            st.download_button(
-                label="Download Original CV (PDF)",
-                data=PDFbyte,
-                file_name="Kaan_Degirmenci_CV.pdf",
-                mime='application/pdf'
-            )
+        PDFbyte = load_cv_pdf(CV_PDF_PATH, os.path.getmtime(CV_PDF_PATH))
+        st.download_button(
+            label="Download Original CV (PDF)",
+            data=PDFbyte,
+            file_name="Kaan_Degirmenci_CV.pdf",
+            mime='application/pdf'
+        )
     except FileNotFoundError:
         st.warning("Kaan_Degirmenci_CV.pdf does not exist.")
 
     # AI Tone Selection
     tone = st.selectbox(
         "Select AI Tone:",
-        ("Professional & Formal", "Enthusiastic & Eager", "Assertive & Confident", "Technical & Precise")
+        TONE_OPTIONS
     )
     st.session_state['tone'] = tone
 
-    # Debug View
-    with st.expander("Architect View (Debug)"):
-        st.json(cv_data)
+    # Model routing (Auto = decided per question by the local router)
+    routing = st.selectbox(
+        "Model Routing:",
+        ROUTING_OPTIONS
+    )
+    st.session_state['routing'] = routing
+
+    # Debug View: the live tables pull in pandas, so they are rendered on request only
+    show_diagnostics = st.toggle("Show diagnostics")
+    precompute_status = None
+    if show_diagnostics:
+        with st.expander("Architect View (Debug)"):
+            st.caption(f"Knowledge base: {get_knowledge_base().status()}")
+            st.json(cv_data)
+            st.markdown("**Key / Model Scheduler**")
+            st.dataframe(get_llm_gateway().scheduler.snapshot(), hide_index=True)
+            st.caption(f"Client pool: {get_client_pool().stats()}")
+            st.markdown("**Response Cache**")
+            st.json(get_response_cache().stats())
+            if get_context_cache():
+                st.caption(f"Context cache ({CONTEXT_CACHE_BACKEND}): {get_context_cache().stats()}")
+            if SIMILAR_QUESTION_THRESHOLD:
+                st.caption(f"Similar questions: {get_question_cache().stats()}")
+            st.caption(f"Background tasks: {get_task_engine().stats()}")
+            st.caption(f"Admission: {get_admission_controller(get_api_keys()).stats()}")
+            st.markdown("**Precomputed Answers**")
+            precompute_status = st.empty()
+            st.markdown("**Script Reruns**")
+            st.json(get_rerun_stats().summary())
+            if get_session_store():
+                st.markdown("**Session Memory**")
+                st.dataframe(get_session_store().report(), hide_index=True)
+
+        with st.expander("LLM Metrics"):
+            metrics = get_metrics()
+            st.caption(f"Tokens in the last minute: {metrics.tokens_per_minute()} | Cache lookups: {metrics.cache_summary()}")
+            st.markdown("**Per model**")
+            st.dataframe(metrics.model_summary(), hide_index=True)
+            st.markdown("**Per key**")
+            st.dataframe(metrics.key_summary(), hide_index=True)
+            st.markdown("**Per route**")
+            st.dataframe(metrics.route_summary(), hide_index=True)
+            st.markdown("**Hedged requests**")
+            st.json(get_llm_gateway().hedge_stats())
+            st.download_button(
+                label="Export (Prometheus format)",
+                data=metrics.to_prometheus(),
+                file_name="llm_metrics.prom",
+                mime="text/plain"
+            )
 
     with st.sidebar.expander("System Architecture"):
         st.markdown("""
@@ -144,7 +531,10 @@ with st.sidebar:
     
     st.markdown("### Skill Distribution")
    
-    st.plotly_chart(plot_skills(), use_container_width=True) 
+    if SKILLS_CHART_STATIC:
+        st.image(get_static_skills_chart(), use_container_width=True)
+    else:
+        st.plotly_chart(plot_skills(), use_container_width=True)
 
     st.markdown("---")
     st.markdown("### Ready to talk?\nkaandeg@gmail.com\n\n" \
@@ -161,164 +551,475 @@ You can interact with my professional background in two modes:
 2. **Standard Mode:** Fast, direct answers from a single AI.
 """)
 
-def get_random_key():
-    if "api_keys" in st.secrets:
-        return random.choice(st.secrets["api_keys"])
-    else:
-        st.error("API Key not founded. Please check the secrets settings..")
-        return None
-
 def load_source_code(file_path):
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             return f.read()
     except FileNotFoundError:
         return "Error: Source code file not found."
-    
+
+def code_vault_signature():
+    # (path, mtime) of every vault file, so an edited file rebuilds the vault
+    signature = []
+    for label, (path, language) in CODE_VAULT_FILES.items():
+        try:
+            modified_at = os.path.getmtime(path)
+        except OSError:
+            modified_at = None
+        signature.append((label, path, language, modified_at))
+    return tuple(signature)
+
+@st.cache_resource(max_entries=2)
+def get_code_vault(signature):
+    return CodeVault([(label, path, language, load_source_code(path)) for label, path, language, _ in signature])
+
 def update_trace_display():
-    """Updates the box in sidebar with session_state data."""
+    """Renders one page of the decision trace (newest first) in the sidebar."""
+    store = get_trace_store()
+    logs = st.session_state.council_logs
+    total = store.count(st.session_state.session_id) if store else len(logs)
 
     with trace_placeholder.container():
 
-        if "council_logs" in st.session_state and st.session_state.council_logs:
+        if total:
             
             st.markdown("### Decision Trace History")
 
-            for log in reversed(st.session_state.council_logs):
+            pages = -(-total // TRACE_PAGE_SIZE)
+            page = st.number_input("Trace page", min_value=1, max_value=pages, value=1, key="trace_page") if pages > 1 else 1
+
+            # Recent pages come from the in-memory ring buffer, older ones from SQLite
+            if store and page * TRACE_PAGE_SIZE > len(logs):
+                entries = store.page(st.session_state.session_id, page, TRACE_PAGE_SIZE)
+            else:
+                entries = page_of(logs, page, TRACE_PAGE_SIZE)
+            latest_id = logs[-1]["id"] if logs else None
+
+            for log in entries:
             
-                is_latest = (log == st.session_state.council_logs[-1])
+                is_latest = log["id"] == latest_id
                     
                 with st.expander(f"Trace #{log['id']}: {log['query'][:20]}...", expanded=is_latest):
                     st.caption(f"Time: {log.get('timestamp', '')}")
                     st.caption(f"Full Query: {log['query']}")
+                    if log.get("precomputed"):
+                        st.caption("Served from the warm-up store.")
+                    if log.get("similar_to"):
+                        st.caption(f"Reused the decision for: {log['similar_to']}")
                         
-                    st.markdown("---")
-                    st.markdown("**Visionary Draft:**")
-                    st.warning(log['draft'])
+                    for i, draft in enumerate(log['drafts'], start=1):
+                        st.markdown("---")
+                        latency = f" ({draft['latency']}s)" if draft.get('latency') is not None else ""
+                        st.markdown(f"**Visionary Draft {i}{latency}:**")
+                        st.warning(draft['text'])
+                        if draft.get('claims'):
+                            claims = draft['claims']
+                            st.caption(f"Claim check: {len(claims['verified'])} verified, {len(claims['flagged'])} flagged")
+                            for flagged in claims['flagged']:
+                                st.caption(f"Flagged: {flagged}")
                         
                     st.markdown("---")
-                    st.markdown("**Auditor Output:**")
+                    if log.get("auditor") == "skipped":
+                        st.markdown("**Final Answer (claim check passed, Auditor skipped, tone applied):**")
+                    elif log.get("auditor") == "narrowed":
+                        st.markdown("**Auditor Output (flagged claims corrected):**")
+                    else:
+                        st.markdown("**Auditor Output:**")
                     st.success(log['final'])
         else:
             st.info("Ask the Council in Tab 1 to see the logic trace.")
 
-def handle_click(question_text):
-    st.session_state.messages.append({"role": "user", "content": question_text})
-    history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in st.session_state.messages])
-        
-    selected_tone = st.session_state.get('tone', "Professional & Formal")
-    
-    full_prompt = f"""
-        You are an AI assistant representing {cv_data['personal_info']['name']}.
-        KNOWLEDGE BASE: {cv_text}
-        TONE: {selected_tone}
-        HISTORY: {history_text}
-        QUESTION: {question_text}
-    
-        INSTRUCTIONS:
-        Answer based ONLY on the CV data. Be impressive but grounded in facts. 
-        Focus on Engineering Architecture and AI Logic.
+def make_standard_prompt(question_text, tone, history_text):
+    return cv_prompt(
+        lambda context: build_standard_prompt(cv_data['personal_info']['name'], context, tone, history_text, question_text),
+        get_cv_context(question_text),
+    )
+
+def make_audit_prompt(user_question, drafts, tone):
+    draft_texts = [d["text"] for d in drafts]
+    return cv_prompt(
+        lambda context: build_audit_prompt(context, draft_texts, tone),
+        get_cv_context(user_question + " " + " ".join(draft_texts)),
+    )
+
+@st.cache_resource(max_entries=2)
+def get_claim_verifier(version, _source_text):
+    return ClaimVerifier(json.loads(_source_text), min_verified=CLAIM_CHECK_MIN_VERIFIED)
+
+def check_council_drafts(drafts):
+    """Fact-checks every draft (the result is kept on the draft for the trace).
+
+    Returns (index, report) of the draft with the fewest flagged and most verified claims.
     """
-    
+    verifier = get_claim_verifier(cv_version, cv_text)
+    reports = []
+    for draft in drafts:
+        report = verifier.verify(draft["text"])
+        draft["claims"] = report.summary()
+        reports.append(report)
+    best = min(range(len(reports)), key=lambda i: (len(reports[i].flagged), -len(reports[i].checked)))
+    return best, reports[best]
+
+def make_correction_prompt(user_question, draft, report, tone):
+    flagged = [claim.describe() for claim in report.flagged]
+    context = get_cv_context(user_question + " " + " ".join(claim.span for claim in report.flagged))
+    return cv_prompt(lambda context: build_correction_prompt(context, draft["text"], flagged, tone), context)
+
+def make_cover_letter_prompt(job_desc, company_name, language, cv=None):
+    # Only the CV evidence for the recognized requirements (retrieval when none are recognized).
+    # It is request-specific, so it stays in the request even with a cached CV.
+    version, text = cv or (cv_version, cv_text)
+    evidence = get_skill_matcher(version, text).match(job_desc).context()
+    return cv_prompt(
+        lambda context: build_cover_letter_prompt(context, job_desc, company_name, language),
+        evidence or get_cv_context(job_desc, cv),
+        cached_context=evidence or None,
+        cv=cv,
+    )
+
+def generate_standard_answer(question_text, tone, history_text):
+    return smart_generate(make_standard_prompt(question_text, tone, history_text), temperature= 0.7, task="standard",
+                          question=question_text)
+
+def generate_council_drafts(user_question, n=COUNCIL_DRAFTS, routing=ROUTE_AUTO):
+    """Runs n Visionary drafts concurrently.
+
+    The scheduler hands each in-flight call the least-loaded (key, model)
+    pair, so parallel drafts spread across keys and models on their own.
+    """
+    draft_prompt = cv_prompt(lambda context: build_draft_prompt(context, user_question), get_cv_context(user_question))
+
+    def run_draft(_):
+        started = time.time()
+        text = smart_generate(draft_prompt, temperature=0.9, task="visionary", question=user_question, routing=routing)
+        return {"text": text, "latency": round(time.time() - started, 2)}
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        # Each draft runs in a copy of this context, so it still sees the current task (and its cancel)
+        futures = [pool.submit(contextvars.copy_context().run, run_draft, i) for i in range(n)]
+        drafts = [future.result() for future in futures]
+
+    valid = [d for d in drafts if not is_error_response(d["text"])]
+    return valid or drafts[:1]
+
+def generate_council_final(user_question, drafts, tone):
+    return smart_generate(make_audit_prompt(user_question, drafts, tone), temperature = 0.2, task="auditor")
+
+@st.cache_resource(max_entries=2)
+def get_precomputed_answers(cv_version):
+    # One store per CV version, all sharing the file of the canned prompts: the warm-up
+    # after a CV change only regenerates the answers whose grounding changed
+    version = hashlib.sha256(
+        json.dumps([COUNCIL_PRESETS, QUICK_INSIGHTS, COUNCIL_DRAFTS]).encode("utf-8")
+    ).hexdigest()[:12]
+    store = PrecomputedAnswers(version, os.path.join(PRECOMPUTE_DIR, f"precomputed_{version}.json"), get_grounding)
+    if PRECOMPUTE_ENABLED:
+        threading.Thread(
+            target=warm_up,
+            args=(
+                store, COUNCIL_PRESETS, QUICK_INSIGHTS, TONE_OPTIONS,
+                generate_council_drafts,
+                generate_council_final,
+                lambda question, tone: generate_standard_answer(question, tone, f"user: {question}"),
+            ),
+            daemon=True,
+        ).start()
+    else:
+        store.finished.set()
+    return store
+
+def summarize_history(previous_summary, transcript, routing=ROUTE_AUTO):
+    return smart_generate(build_summary_prompt(previous_summary, transcript), temperature=0.2, task="summary",
+                          routing=routing)
+
+def stream_into_task(stream):
+    """Reads a text stream inside a task, publishing every chunk for the progress view.
+
+    Stops reading (and closes the stream) as soon as the task is cancelled.
+    """
+    task = current_task()
+    parts = []
     try:
-        
-        response = smart_generate(full_prompt, temperature= 0.7)
+        for text in stream:
+            task.check()
+            task.stream(text)
+            parts.append(text)
+    finally:
+        stream.close()
+    return "".join(parts)
 
-        st.session_state.messages.append({"role": "assistant", "content": response})
+def run_standard_answer(question_text, tone, routing, messages, memory_state):
+    """Standard Mode answer as a background task; works on copies of the session's messages and memory."""
+    summarized_from = memory_state["summarized_upto"]
+    history_text = ConversationMemory(HISTORY_TOKEN_BUDGET).build(
+        messages, memory_state, lambda summary, transcript: summarize_history(summary, transcript, routing)
+    )
+    current_task().check()
+    response = stream_into_task(
+        smart_generate_stream(make_standard_prompt(question_text, tone, history_text), temperature= 0.7, task="standard",
+                              question=question_text, routing=routing)
+    )
+    if not is_error_response(response):
+        remember_answer(question_text, "standard", tone, response)
+    return {"answer": response, "memory": memory_state, "summarized_from": summarized_from}
+
+def finish_standard_answer(result):
+    memory = st.session_state.chat_memory
+    # Turns may have been spilled while the task ran, so the fold is applied as an offset
+    advanced = result["memory"]["summarized_upto"] - result["summarized_from"]
+    memory["summary"] = result["memory"]["summary"]
+    memory["summarized_upto"] = max(0, memory["summarized_upto"] + advanced)
+    st.session_state.messages.append({"role": "assistant", "content": result["answer"]})
+
+def handle_click(question_text, preset=None):
+    st.session_state.messages.append({"role": "user", "content": question_text})
+    selected_tone = st.session_state.get('tone', "Professional & Formal")
+
+    try:
+        precomputed = get_precomputed_answers(cv_version).get("insight", preset, selected_tone) if preset else None
+        similar = None if preset else find_similar_answer(question_text, "standard", selected_tone)
+        if precomputed:
+            st.session_state.messages.append({"role": "assistant", "content": precomputed["answer"]})
+        elif similar:
+            st.session_state.messages.append({"role": "assistant", "content": similar[0]})
+        else:
+            # Answered in the background; the tab polls the task and streams its text
+            get_task_engine().submit(
+                st.session_state.session_id, "standard", run_standard_answer,
+                question_text, selected_tone, current_routing(),
+                list(st.session_state.messages), dict(st.session_state.chat_memory),
+                label=question_text,
+            )
         st.rerun() 
             
     except Exception as e:
         st.error(f"Error: {e}")
 
-def smart_generate(prompt, temperature=0.7):
+def generate_batch_letter(row, settings):
+    # The cached runner keeps the first script run's globals, so the CV comes with the job
+    prompt = make_cover_letter_prompt(row["job_description"], row["company"], row["language"], cv=settings["cv"])
+    return smart_generate(prompt, temperature=0.7, task="cover_letter", routing=settings.get("routing", ROUTE_AUTO))
 
-    for model_name in MODEL_POOL:
-        try:
-            current_key = get_random_key()
-            genai.configure(api_key=current_key)
-                
-            model = genai.GenerativeModel( 
-                model_name, 
-                generation_config=genai.GenerationConfig(temperature=temperature)
-            )
-                
-            response = model.generate_content(prompt)
-            return response.text
-                
-        except exceptions.ResourceExhausted:
-            # 429 Error (Cota Limit)
-            print(f"Cota Full! Model: {model_name}, Key...{current_key[-4:]}. Back-up System starts...")
-            continue 
-                
-        except Exception as e:
-            print(f"Error: {e}. Trying Alternatives.")
-            continue
+@st.cache_resource
+def get_batch_runner(api_keys):
+    # Throughput grows with the number of keys; each worker still waits for its key's quota
+    workers = min(BATCH_MAX_WORKERS, BATCH_WORKERS_PER_KEY * max(1, len(api_keys)))
+    return BatchRunner(generate_batch_letter, BATCH_DIR, workers=workers,
+                       max_attempts=BATCH_MAX_ATTEMPTS, retry_delay=BATCH_RETRY_DELAY_SECONDS)
+
+def render_batch_progress(job, polling):
+    progress = job.progress()
+    finished = progress["done"] + progress["failed"]
+    st.progress(finished / progress["total"],
+                text=f"{progress['done']}/{progress['total']} letters ready, {progress['running']} in progress, "
+                     f"{progress['failed']} failed")
+    st.dataframe(job.table(), hide_index=True)
+    if polling and not job.running:
+        st.rerun()  # stop polling and refresh the buttons
+
+def render_batch_job(job):
+    polling = job.running
+    st.fragment(render_batch_progress, run_every=BATCH_POLL_SECONDS if polling else None)(job, polling)
+
+    remaining = len(job.todo())
+    if not job.running and remaining:
+        label = "Start Batch" if remaining == len(job.rows) else f"Resume Batch ({remaining} remaining)"
+        if st.button(label, key=f"batch_start_{job.id}"):
+            get_batch_runner(get_api_keys()).start(job, {"routing": current_routing(), "cv": (cv_version, cv_text)})
+            st.rerun()
+    if job.progress()["done"]:
+        st.download_button("Download Letters (.zip)", job.archive(), file_name=f"cover_letters_{job.id}.zip",
+                           mime="application/zip", key=f"batch_zip_{job.id}")
+
+def current_routing():
+    # Only read from the script thread; worker threads get the value passed in
+    return st.session_state.get('routing', ROUTE_AUTO)
 
-    return "Error: System is out of Limit. Resources are empty"
+def admission_args(task):
+    """Who is asking, for the admission queue: the visitor's task, or background work (warm-up, batch)."""
+    current = current_task()
+    if current is None:
+        return {"session_id": None, "priority": PRIORITY_BACKGROUND, "on_position": None}
+    return {"session_id": current.session_id, "priority": ADMISSION_PRIORITIES.get(task, PRIORITY_HEAVY),
+            "on_position": current.set_queue_position}
 
-def process_council_interaction(user_question):
+def smart_generate(prompt, temperature=0.7, use_cache=True, task="default", question=None, routing=ROUTE_AUTO):
+    route, models = get_query_router().route(task, question, prompt_text(prompt), routing)
+    # Inside a background task, cancelling it stops any further attempt
+    return get_llm_gateway().generate(prompt, temperature=temperature, use_cache=use_cache, task=task,
+                                      models=models, route=route, cancel=current_cancel(), **admission_args(task))
+
+def smart_generate_stream(prompt, temperature=0.7, use_cache=True, task="default", question=None, routing=ROUTE_AUTO):
+    route, models = get_query_router().route(task, question, prompt_text(prompt), routing)
+    return get_llm_gateway().generate_stream(prompt, temperature=temperature, use_cache=use_cache, task=task,
+                                             models=models, route=route, cancel=current_cancel(),
+                                             **admission_args(task))
+
+def run_council(user_question, tone, routing):
+    """Council round as a background task: Visionary drafts, local claim check, Auditor if needed."""
+    task = current_task()
+    auditor = None
+
+    # --- STEP 1: VISIONARY AGENTS (High Creativity, in parallel) ---
+    task.step(f"**Agent 1 (Visionary x{COUNCIL_DRAFTS}):** Drafting independent creative responses...")
+    drafts = generate_council_drafts(user_question, routing=routing)
+    task.check()
+    for i, draft in enumerate(drafts, start=1):
+        task.step(f"Draft {i} ready in {draft['latency']}s")
+
+    # --- STEP 2: LOCAL CLAIM CHECK (no LLM call) ---
+    best, report = check_council_drafts(drafts) if CLAIM_CHECK_ENABLED else (0, None)
+    if report and report.clean:
+        auditor = "skipped"
+        task.step(f"**Claim check:** all {len(report.checked)} checked claims in draft {best + 1} match the CV, "
+                  "the Auditor is not needed.")
+        # The Visionary draft ignores the tone; only the rewrite into it is left
+        task.step(f"Rewriting the answer in a {tone} tone...")
+        final_answer = stream_into_task(
+            smart_generate_stream(build_tone_prompt(drafts[best]["text"], tone), temperature=0.2, task="tone",
+                                  question=user_question, routing=routing)
+        )
+        if is_error_response(final_answer):
+            final_answer = drafts[best]["text"]
+    else:
+        # --- STEP 3: AUDITOR AGENT (Strict Logic / Random Forest Filter) ---
+        # Pacing per key/model is handled by the scheduler, no fixed sleep needed
+        if report and report.flagged:
+            auditor = "narrowed"
+            task.step(f"**Agent 2 (Auditor):** Correcting {len(report.flagged)} flagged claims in draft {best + 1}...")
+            audit_prompt = make_correction_prompt(user_question, drafts[best], report, tone)
+        else:
+            auditor = "full"
+            task.step("**Agent 2 (Auditor):** Applying 'Random Forest' logic (Variance Reduction)...")
+            audit_prompt = make_audit_prompt(user_question, drafts, tone)
+        task.step("Auditor is writing the final answer...")
+        final_answer = stream_into_task(
+            smart_generate_stream(audit_prompt, temperature = 0.2, task="auditor",
+                                  question=user_question, routing=routing)
+        )
+    if not is_error_response(final_answer):
+        remember_answer(user_question, "council", tone, {"drafts": drafts, "final": final_answer})
+    return {"drafts": drafts, "final": final_answer, "auditor": auditor}
+
+def finish_council(user_question, drafts, final, auditor=None, precomputed=False, similar_to=None):
+    """Adds the decision to the Council history and the Decision Trace."""
+   # Save to History
+    st.session_state.history_council.append({"role": "assistant", "content": final})
+
+    new_log = {
+        "id": st.session_state.trace_next_id, # Unique ID (the ring buffer drops old entries)
+        "query": user_question,
+        "drafts": drafts,
+        "final": final,
+        "precomputed": precomputed,
+        "similar_to": similar_to,
+        "auditor": auditor,
+        "timestamp": time.strftime("%H:%M:%S"),
+        "created_at": time.time(),
+    }
+    
+    st.session_state.trace_next_id += 1
+    st.session_state.council_logs.append(new_log)
+    if get_trace_store():
+        get_trace_store().add(st.session_state.session_id, new_log)
+
+def process_council_interaction(user_question, preset=None):
      # 1. Append User Message to History
     st.session_state.history_council.append({"role": "user", "content": user_question})
-        
-    # 2. Start the Agent Process
+
+    # --- SAFE TONE RETRIEVAL ---
+    # Prevents crashes if 'tone' hasn't been set in sidebar yet
+    current_tone = st.session_state.get('tone', "Professional & Technical")
+
+    precomputed = get_precomputed_answers(cv_version).get("council", preset, current_tone) if preset else None
+    similar = None if preset else find_similar_answer(user_question, "council", current_tone)
+    if not precomputed and not similar:
+        # 2. Convene the Council in the background; the chat window polls its progress
+        get_task_engine().submit(
+            st.session_state.session_id, "council", run_council, user_question, current_tone, current_routing(),
+            label=user_question,
+        )
+        st.rerun()
+
     with st.chat_message("assistant"):
         status_box = st.status("The Council is convened...", expanded=True)
             
         try:
-            # --- SAFE TONE RETRIEVAL ---
-            # Prevents crashes if 'tone' hasn't been set in sidebar yet
-            current_tone = st.session_state.get('tone', "Professional & Technical")
+            if precomputed:
+                status_box.write("**Council:** Decision loaded from the warm-up store.")
+                drafts = precomputed["drafts"]
+                final_answer = precomputed["final"]
+            else:
+                status_box.write(f"**Council:** Reusing the decision for a similar question: \"{similar[1]}\"")
+                drafts = similar[0]["drafts"]
+                final_answer = similar[0]["final"]
 
-            # --- STEP 1: VISIONARY AGENT (High Creativity) ---
-            status_box.write("**Agent 1 (Visionary):** Drafting creative response...")
-                
-            draft_prompt = f"""
-            Role: Enthusiastic Job Candidate.
-            CV KNOWLEDGE: {cv_text}
-            USER QUESTION: {user_question}
-            INSTRUCTION: Be bold, highlight potential. It is okay to be slightly creative connecting dots.
-            """
-            draft_response = smart_generate(draft_prompt, temperature=0.9)
-                
-            # --- STEP 2: AUDITOR AGENT (Strict Logic / Random Forest Filter) ---
-            time.sleep(1) # Be gentle on the API
-            status_box.write("**Agent 2 (Auditor):** Applying 'Random Forest' logic (Variance Reduction)...")
-                
-            audit_prompt = f"""
-            Role: Strict Fact-Checker & CV Auditor.
-            GROUND TRUTH (CV): {cv_text}
-            DRAFT ANSWER: {draft_response}
-                
-            YOUR TASK:
-            1. You are the 'Ensemble' filter. Correct any hallucinations in the draft.
-            2. Ensure the answer strictly matches the CV skills (especially the ML/AI section).
-            3. Convert the tone to: {current_tone}.
-            4. Output ONLY the final polished answer.
-            """
-            final_answer = smart_generate(audit_prompt, temperature = 0.2)
-                
             # --- FINALIZE ---
             status_box.update(label="Decision Reached!", state="complete", expanded=False)
             st.markdown(final_answer)
-                
-           # Save to History
-            st.session_state.history_council.append({"role": "assistant", "content": final_answer})
-
-            new_log = {
-                "id": len(st.session_state.council_logs) + 1, # Unique ID
-                "query": user_question,
-                "draft": draft_response, 
-                "final": final_answer,
-                "timestamp": time.strftime("%H:%M:%S") 
-            }
-            
-            st.session_state.council_logs.append(new_log)
-            update_trace_display()
+            finish_council(user_question, drafts, final_answer, precomputed=bool(precomputed),
+                           similar_to=similar[1] if similar else None)
                 
         except Exception as e:
             status_box.update(label="System Error", state="error")
             st.error(f"Council Process Error: {e}")
 
+def run_cover_letter(job_desc, company_name, language, routing):
+    current_task().step("Analyzing job requirements...")
+    cl_prompt = make_cover_letter_prompt(job_desc, company_name, language)
+    text = stream_into_task(smart_generate_stream(cl_prompt, temperature= 0.7, task="cover_letter", routing=routing))
+    return {"company": company_name, "text": text}
+
+def collect_finished_tasks():
+    """Applies the result of every task of this session that finished since the last run (once each).
+
+    Returns {slot: message} for tasks that failed or were stopped, shown once in their tab.
+    """
+    engine = get_task_engine()
+    session_id = st.session_state.session_id
+    engine.touch(session_id)
+    notices = {}
+    for slot in TASK_TITLES:
+        task = engine.take(session_id, slot)
+        if task is None:
+            continue
+        if task.status == CANCELLED:
+            notices[slot] = "Stopped before an answer was ready."
+        elif task.status != DONE:
+            notices[slot] = f"Error: {task.error}"
+        elif slot == "council":
+            finish_council(task.label, **task.result)
+        elif slot == "standard":
+            finish_standard_answer(task.result)
+        else:
+            st.session_state.cover_letter = task.result
+    return notices
+
+def render_task_progress(slot):
+    """Polled view of the running task in slot; a full rerun takes over once it has finished."""
+    engine = get_task_engine()
+    session_id = st.session_state.session_id
+    engine.touch(session_id)
+    task = engine.get(session_id, slot)
+    if task is None or task.finished:
+        st.rerun()
+    steps, partial = task.progress()
+    label = "Stopping..." if task.cancelled else TASK_TITLES[slot]
+    with st.status(label, expanded=not partial):
+        for step in steps:
+            st.write(step)
+        if task.queue_position:
+            st.caption(f"Many visitors right now: waiting in line (position {task.queue_position}).")
+    if partial:
+        st.markdown(partial)
+    st.button("Stop", key=f"task_stop_{slot}", on_click=engine.cancel, args=(session_id, slot))
+
+def has_task(slot):
+    return get_task_engine().get(st.session_state.session_id, slot) is not None
+
+def render_task(slot):
+    st.fragment(render_task_progress, run_every=TASK_POLL_SECONDS)(slot)
+
 def get_or_create_chat_window():
         with history_placeholder.container():
             window = st.container(height=500, border=True)
@@ -327,11 +1028,19 @@ def get_or_create_chat_window():
                 if "history_council" not in st.session_state:
                     st.session_state.history_council = []
             
+                render_earlier_messages("history_council")
                 for msg in st.session_state.history_council:
                     with st.chat_message(msg["role"]):
                         st.markdown(msg["content"])
             return window
 
+# Starts the background warm-up once per process / CV version
+precompute_store = get_precomputed_answers(cv_version)
+if precompute_status is not None:
+    precompute_status.json(precompute_store.status())
+
+task_notices = collect_finished_tasks()
+
 tab1, tab2, tab3, tab4 = st.tabs(["Chat with Kaan's AI Council(Council Mode)", "Chat with Kaan's AI(Standard Mode)", "Generate Cover Letter", "Code Vault"])
 
 # TAB 1: COUNCIL MODE 
@@ -340,8 +1049,8 @@ with tab1:
     st.subheader("The Council: Architecture over Hallucination")
     st.info("""
     **How this works:** This uses a Multi-Agent 'Refiner' pattern inspired by **Random Forest / Ensemble Learning**. 
-    1. **Agent A (Visionary):** Drafts a bold, creative answer (High Temperature).
-    2. **Agent B (Auditor):** Checks the draft against the JSON CV data to ensure 100% factual accuracy (Low Temperature).
+    1. **Agent A (Visionary):** Several independent drafts of a bold, creative answer, generated in parallel (High Temperature).
+    2. **Agent B (Auditor):** Reconciles the drafts and checks them against the JSON CV data to ensure 100% factual accuracy (Low Temperature).
     
     *Result: Zero hallucination, maximum impact (Variance Reduction).*
     """)
@@ -356,39 +1065,19 @@ with tab1:
 
     if "history_council" in st.session_state and st.session_state.history_council:
         chat_window = get_or_create_chat_window()
+        if has_task("council"):
+            with chat_window:
+                with st.chat_message("assistant"):
+                    render_task("council")
+    if "council" in task_notices:
+        st.warning(task_notices["council"])
 
-    # Button 1: T-Shaped Student
-    if col_c1.button("T-Shaped Student", use_container_width=True):
-        if chat_window is None:
-            chat_window = get_or_create_chat_window()
-        with chat_window:  
-            process_council_interaction(
-                "Analyze Kaan's technical spectrum based on the entire CV data. "
-                "How does combining 'Low-Level Control' (Assembly, C, Real-time) with 'High-Level Data Science' (R, SQL, AI) "
-                "make him a uniquely qualified System Architect? Prove that he is not just a coder, but a 'T-Shaped' student."
-            )
-    
-    # Button 2: AI Knowledge
-    if col_c2.button("First-Principles AI Logic", use_container_width=True):
-        if chat_window is None:
-            chat_window = get_or_create_chat_window()
-        with chat_window:  
-            process_council_interaction(
-                "Does Kaan possess a true 'First-Principles' understanding of AI beyond just using libraries? "
-                "Synthesize his knowledge of Neural Network math (Backprop), Unsupervised Learning metrics (Elbow Method), "
-                "and Strategic Logic (Reinforcement Learning concepts)."
-            )
-
-    # Button 3: Internship Value
-    if col_c3.button("High-Impact Intern Potential", use_container_width=True):
-        if chat_window is None:
-            chat_window = get_or_create_chat_window()
-        with chat_window:  
-            process_council_interaction(
-                "Synthesize Kaan's academic rigor (Grades) and his 'End-to-End Ownership' in projects (IoT, SUMO). "
-                "Why is he a 'High-ROI' candidate for a Summer 2026 internship? "
-                "Who is eager to improve himself especially in complex architectural tasks?"
-            )
+    for col, (label, question) in zip((col_c1, col_c2, col_c3), COUNCIL_PRESETS.items()):
+        if col.button(label, use_container_width=True):
+            if chat_window is None:
+                chat_window = get_or_create_chat_window()
+            with chat_window:
+                process_council_interaction(question, preset=label)
 
     if prompt_council := st.chat_input("Ask a complex question to the Council...", key="council_input"):
         if chat_window is None:
@@ -400,7 +1089,6 @@ with tab1:
 
 # TAB 2: CHATBOT
 with tab2:
-    genai.configure(api_key = get_random_key())
     st.markdown("""
     You can ask me anything about Kaan's professional background, skills, and projects.
     """)
@@ -408,24 +1096,22 @@ with tab2:
     if "messages" not in st.session_state:
         st.session_state.messages = []
 
+    render_earlier_messages("messages")
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.write(message["content"])
+    if has_task("standard"):
+        with st.chat_message("assistant"):
+            render_task("standard")
+    if "standard" in task_notices:
+        st.warning(task_notices["standard"])
 
     st.markdown("### Quick Insights:")
     col1, col2, col3= st.columns(3)
 
-    if col1.button("Academic Highlights"):
-        q_text = "Extract Kaan's current GPA and list his key course grades in descending order from the CV data. "
-        handle_click(q_text)
-
-    if col2.button("Java OOP Architectur"):
-        q_text = "Don't just list the features. Analyze the architectural complexity of the SUMO Traffic Wrapper.How did Kaan apply strict Object-Oriented Design (OOP) and concurrency to manage the simulation?"
-        handle_click(q_text)
-
-    if col3.button("Tech Stack List"):
-        q_text = "List all programming languages and tools Kaan is proficient in, categorized by domain (Backend, Embedded, AI)."
-        handle_click(q_text)
+    for col, (label, question) in zip((col1, col2, col3), QUICK_INSIGHTS.items()):
+        if col.button(label):
+            handle_click(question, preset=label)
 
     # Chat Input
     prompt = st.chat_input("Ask a question about Kaan...")
@@ -445,40 +1131,83 @@ with tab3:
         language_opt = st.selectbox("Output Language", ["Detect Automatically", "English", "Deutsch"])
         
     job_desc = st.text_area("Paste Job Description Here", height=200)
+    if job_desc:
+        render_skill_match(get_skill_matcher(cv_version, cv_text).match(job_desc))
     
     generate_btn = st.button("Generate Cover Letter", type="primary")
 
     if generate_btn and job_desc and company_name:
-        with st.spinner("Analyzing job requirements..."):
-            try:
-                cl_prompt = f"""
-                Act as Kaan Değirmenci. 
-                MY CV DATA: {cv_text}
-                TARGET JOB DESCRIPTION: '{job_desc}'
-                TASK: Write a cover letter for {company_name}.
-                """
-                response_text = smart_generate(cl_prompt, temperature= 0.7)
-                st.markdown("### Your Draft Application:")
-                st.markdown(response_text)
-                
-            except Exception as e:
-                st.error(f"Error: {e}")
+        get_task_engine().submit(
+            st.session_state.session_id, "cover_letter", run_cover_letter,
+            job_desc, company_name, language_opt, current_routing(), label=company_name,
+        )
+        st.session_state.pop("cover_letter", None)
+
+    if has_task("cover_letter"):
+        st.markdown("### Your Draft Application:")
+        render_task("cover_letter")
+    elif st.session_state.get("cover_letter"):
+        st.markdown(f"### Your Draft Application ({st.session_state.cover_letter['company']}):")
+        st.markdown(st.session_state.cover_letter["text"])
+    if "cover_letter" in task_notices:
+        st.warning(task_notices["cover_letter"])
+
+    st.markdown("---")
+    st.subheader("Batch Applications")
+    batch_file = st.file_uploader(
+        "Upload a CSV or JSON list of applications (company, job_description, optional language)",
+        type=["csv", "json"],
+    )
+    if batch_file is not None:
+        try:
+            batch_rows = parse_applications(batch_file.getvalue(), batch_file.name, max_rows=BATCH_MAX_ROWS)
+        except (ValueError, UnicodeDecodeError) as e:
+            st.error(f"Could not read the file: {e}")
+        else:
+            render_batch_job(get_batch_runner(get_api_keys()).job(batch_rows))
 
 
 # TAB 4: CODE VAULT 
 
 with tab4:
     st.header("Under the Hood")
-    project_choice = st.selectbox("Select a Project:", ["SUMO Traffic Wrapper (Java)", "IoT Handler (C++)", "ChatBot(Python)"])
-    
-    if project_choice == "SUMO Traffic Wrapper (Java)":
-        code_content = load_source_code("SimulationManager.java")
-        st.code(code_content, language= 'java')
-        
-    elif project_choice == "IoT Handler (C++)":
-       code_content = load_source_code("IoTcode/IoTcode.ino")
-       st.code(code_content, language = 'c++')
-    
-    elif project_choice == "ChatBot(Python)":
-        code_content = load_source_code("app_display.py")
-        st.code(code_content, language = 'python')
\ No newline at end of file
+    vault = get_code_vault(code_vault_signature())
+    project_choice = st.selectbox("Select a Project:", list(CODE_VAULT_FILES))
+    vault_query = st.text_input("Jump to a symbol or text:", placeholder="e.g. triggerFlow, setup, smart_generate")
+
+    # Only the selected section / page is highlighted and sent to the browser
+    hit = None
+    if vault_query:
+        hits = vault.search(vault_query)
+        if hits:
+            hit = st.selectbox("Matches:", hits, format_func=lambda h: f"{h[0]} | line {h[1]}: {h[2]}")
+        else:
+            st.caption("No matches.")
+
+    if hit:
+        source = vault.files[hit[0]]
+        section = source.section_at(hit[1])
+        start, end = section.start, section.end
+    else:
+        source = vault.files[project_choice]
+        view = st.radio("View:", ["By symbol", "Pages"], horizontal=True)
+        if view == "By symbol":
+            section = st.selectbox(
+                "Section:", source.sections, format_func=lambda s: f"{s.name} (lines {s.start}-{s.end})"
+            )
+            start, end = section.start, section.end
+        else:
+            page = st.number_input("Page:", min_value=1, max_value=source.page_count(CODE_VAULT_PAGE_SIZE), value=1)
+            start, end, _ = source.page(page, CODE_VAULT_PAGE_SIZE)
+
+    st.caption(f"{source.path}: lines {start}-{end} of {len(source.lines)}")
+    st.code(source.excerpt(start, end), language=source.language)
+
+
+# --- DECISION TRACE (sidebar) ---
+# Rendered last so a trace added during this run is already on the first page
+update_trace_display()
+
+
+# --- RERUN BUDGET ---
+get_rerun_stats().record(time.perf_counter() - rerun_started)
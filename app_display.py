@@ -24,64 +24,9 @@ if "council_logs" not in st.session_state:
     st.session_state.council_logs = []
 
 # --- 2. DATA (CV) - Shared ---
-cv_data = {
-    "personal_info": {
-        "name": "Kaan Degirmenci",
-        "role": "Computer Science Student & Future System Architect",
-        "contact": "kaandeg@gmail.com | https://www.linkedin.com/in/kaan-degirmenci-23a5a03a4/",
-        "summary": "Forward-thinking Computer Science student transitioning from a 'Coder' to a 'Solutions Architect'. . Skilled in bridging the gap between low-level hardware (Assembly/C) and high-level data architecture (SQL/AI)."
-    },
-    "education": {
-        "university": "Frankfurt University of Applied Sciences",
-        "degree": "B.Sc. Computer Science (Informatik)",
-        "current_status": "3rd Year Student",
-        "gpa": "2.4 (German Grading Scale)",
-        "key_coursework_grades": {
-            "Introduction to Programming with C": "1.0",
-            "Computer Architecture (Assembly & Hardware-Software Interface)": "3.3",
-            "Databases (SQL)": "2.3",
-            "Probability and Statistics (Data Analysis with R)": "2.7",
-            "Object Oriented Programming with C++": "1.7",
-            "Real-time Systems": "1.7",
-            "Artificial Intelligence": "2.3",
-            "Software Engineering Analysis": "Current Focus: System Architecture",
-            "IoT Sensor Lab": "Project-Based"
-        }
-    },
-    "technical_skills": {
-        "core_philosophy": ["System Architecture", "First-Principles AI", "Object-Oriented Design"],
-        "programming_languages": ["Java (Advanced)", "Python (AI/ML Focus)", "C++ (Embedded)", "SQL", "R (Statistical Data Analysis)", "JavaScript"],
-        "ai_ml_knowledge": [
-            "Deep Learning Architecture: CNNs (Conv2D, Pooling), Backpropagation, Optimizers (Adam/SGD)",
-            "Reinforcement Learning Logic: Understanding Agent-Environment interaction, Markov Decision Processes (MDP), and Delayed Rewards (Long-term Strategy vs. Short-term Penalty)", # <-- YENİ EKLENEN
-            "Unsupervised Strategy: K-Means Clustering (Optimizing 'k' via Elbow Method, Inertia & Silhouette Score)",
-            "Supervised Logic: Multi-class Classification (Softmax) vs. Binary (Sigmoid), Decision Tree, Random Forest",
-            "Math Foundation: Linear Algebra (Matrix Operations), Calculus (Gradients)"
-        ]
-    },
-    "projects": [
-        {
-            "name": "Advanced Traffic Simulation Wrapper (SUMO)",
-            "tech_stack": "Java (OOP), GUI Framework (Swing/JavaFX), SUMO Engine",
-            "link": "https://github.com/kaanbabaa/SUMO",
-            "details": "Engineered a robust Java wrapper for the SUMO (Simulation of Urban MObility) engine using strict Object-Oriented principles. Developed a dynamic GUI to visualize real-time traffic data, implementing multi-threading to ensure the simulation loop ran asynchronously without freezing the user interface. Focused on parsing complex XML configuration files to control vehicle behaviors programmatically."
-        },
-        {
-            "name": "Machine Learning & Computer Vision Fundamentals",
-            "tech_stack": "Python, NumPy, Custom Neural Networks",
-            "details": "Developed scalable CNN architectures for Multi-class Classification (CIFAR-10 Vehicles, MNIST Digits). Distinguished by a 'Glass Box' approach: Applied deep theoretical knowledge of the underlying mathematics (Chain Rule for Backpropagation, Matrix Operations) to fine-tune 'Black Box' model parameters. utilized Kaggle datasets with rigorous Train/Test splitting to validate model generalization and mitigate overfitting."},
-        {
-            "name": "Smart Trash Bin (IoT System)",
-            "tech_stack": "C++, ESP8266, Firebase, Google Apps Script",
-            "details": "Designed an end-to-end IoT architecture connecting physical hardware to the cloud. Programmed an ESP8266 microcontroller to read distance data from an HC-SR04 sensor. Solved hardware limitations by implementing a software-side 'Signal Smoothing Algorithm' to filter out sensor noise/fluctuations. Established a WebSocket connection to Firebase for real-time status updates on a web dashboard."        },
-        {
-            "name": "AI Powered CV Assistant (RAG App)",
-            "tech_stack": "Python, Gemini API, Streamlit",
-            "details": "Developed a 'Chat with Data' application acting as a proof-of-concept for RAG (Retrieval Augmented Generation) systems. Implemented a Multi-Agent architecture ('Visionary' vs 'Auditor') to reduce AI hallucinations. Used Streamlit Session State for memory management and designed a modular prompt engineering structure to switch between 'Professional' and 'Creative' modes dynamically."
-        }
-    ],
-    "internship_expectations": "Seeking a challenging Summer 2026 Internship that bridges the gap between Low-Level Engineering (Embedded/IoT) and High-Level Software Architecture (AI/Cloud). I am eager to move beyond simple task execution and contribute to scalable system designs, applying my 'T-Shaped' skills in Object-Oriented Design and Data Logic to solve real-world engineering problems."
-}
+# Same file the main app reads, so the two can no longer drift apart
+with open("knowledge_base.json", "r", encoding="utf-8") as f:
+    cv_data = json.load(f)
 
 cv_text = json.dumps(cv_data, indent=2)
 
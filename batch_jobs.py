@@ -0,0 +1,235 @@
+"""Batch cover letter jobs for the Cover Letter tab.
+
+An uploaded CSV / JSON list of applications becomes a BatchJob whose rows are
+worked off by a bounded thread pool in the background. Every finished row is
+saved to disk right away, so a job interrupted by errors or a restart can be
+resumed where it stopped, and the results can be downloaded as a zip archive.
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from precompute import is_error_response
+
+# Accepted column names, first one is canonical
+COLUMN_ALIASES = {
+    "company": ("company", "company_name", "company name"),
+    "job_description": ("job_description", "job_desc", "job description", "description"),
+    "language": ("language", "lang", "output_language"),
+}
+DEFAULT_LANGUAGE = "Detect Automatically"
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+def _canonical_row(raw, number):
+    fields = {str(k).strip().lower(): v for k, v in raw.items() if k is not None}
+    row = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        value = next((fields[a] for a in aliases if fields.get(a) not in (None, "")), "")
+        row[name] = str(value).strip()
+    if not row["company"] or not row["job_description"]:
+        raise ValueError(f"Row {number}: 'company' and 'job_description' are required.")
+    row["language"] = row["language"] or DEFAULT_LANGUAGE
+    return row
+
+
+def parse_applications(data, filename, max_rows=None):
+    """Rows of {company, job_description, language} from CSV or JSON bytes."""
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    if filename.lower().endswith(".json"):
+        records = json.loads(text)
+        if isinstance(records, dict):
+            records = records.get("applications", [])
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise ValueError("JSON must be a list of objects (or {\"applications\": [...]}).")
+    else:
+        records = list(csv.DictReader(io.StringIO(text)))
+    rows = [_canonical_row(record, number) for number, record in enumerate(records, start=1)]
+    if not rows:
+        raise ValueError("The file contains no applications.")
+    if max_rows and len(rows) > max_rows:
+        raise ValueError(f"The file has {len(rows)} applications; at most {max_rows} are accepted per batch.")
+    return rows
+
+
+def job_id_for(rows):
+    return hashlib.sha256(json.dumps(rows, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _file_stem(number, company):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", company).strip("_")[:40] or "company"
+    return f"{number:03d}_{slug}"
+
+
+class BatchJob:
+    """Rows plus per-row status, result and error, saved to a JSON file after every change."""
+
+    def __init__(self, rows, path=None):
+        self.id = job_id_for(rows)
+        self.path = path
+        self.rows = rows
+        self.status = [PENDING] * len(rows)
+        self.results = [None] * len(rows)
+        self.errors = [None] * len(rows)
+        self.attempts = [0] * len(rows)
+        self.created_at = time.time()
+        self.running = False
+        self.settings = {}
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                if saved.get("id") == self.id:
+                    self.status = [DONE if s == DONE else PENDING if s == RUNNING else s for s in saved["status"]]
+                    self.results = saved["results"]
+                    self.errors = saved["errors"]
+                    self.attempts = saved.get("attempts", self.attempts)
+                    self.created_at = saved.get("created_at", self.created_at)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Could not load batch job {self.id}: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        # Written under the lock so concurrent rows never interleave on the temp file
+        with self._lock:
+            payload = {
+                "id": self.id, "created_at": self.created_at, "rows": self.rows, "status": self.status,
+                "results": self.results, "errors": self.errors, "attempts": self.attempts,
+            }
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Could not save batch job {self.id}: {e}")
+
+    def set(self, index, status, result=None, error=None):
+        with self._lock:
+            self.status[index] = status
+            if result is not None:
+                self.results[index] = result
+            self.errors[index] = error
+        self.save()
+
+    def todo(self):
+        """Rows that still need a letter (pending or failed earlier)."""
+        with self._lock:
+            return [i for i, status in enumerate(self.status) if status in (PENDING, FAILED)]
+
+    def progress(self):
+        with self._lock:
+            counts = {status: self.status.count(status) for status in (PENDING, RUNNING, DONE, FAILED)}
+        counts["total"] = len(self.rows)
+        counts["running_job"] = self.running
+        return counts
+
+    def table(self):
+        with self._lock:
+            return [
+                {"#": i + 1, "company": row["company"], "language": row["language"], "status": self.status[i],
+                 "attempts": self.attempts[i], "error": self.errors[i] or ""}
+                for i, row in enumerate(self.rows)
+            ]
+
+    def archive(self):
+        """Zip with one text file per finished letter plus a manifest of every row."""
+        buffer = io.BytesIO()
+        manifest = self.table()
+        with self._lock:
+            results = list(self.results)
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for i, row in enumerate(self.rows):
+                if results[i] and manifest[i]["status"] == DONE:
+                    archive.writestr(f"{_file_stem(i + 1, row['company'])}.txt", results[i])
+            archive.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+        return buffer.getvalue()
+
+
+class BatchRunner:
+    """Runs batch jobs in the background with a bounded, process-wide worker pool.
+
+    generate(row, settings) returns the letter text (or an "Error: ..." string). Rows that
+    fail are retried up to max_attempts times with a growing pause, which gives
+    rate-limited keys time to refill; what still fails stays resumable.
+    """
+
+    def __init__(self, generate, directory, workers=2, max_attempts=3, retry_delay=5.0):
+        self.generate = generate
+        self.directory = directory
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch")
+
+    def job(self, rows):
+        """The job for these rows, reloaded from disk when the same list was submitted before."""
+        job_id = job_id_for(rows)
+        with self._lock:
+            if job_id not in self._jobs:
+                self._jobs[job_id] = BatchJob(rows, os.path.join(self.directory, f"batch_{job_id}.json"))
+            return self._jobs[job_id]
+
+    def start(self, job, settings=None):
+        """Queues every row that is not done yet; a no-op while the job is already running.
+
+        settings (e.g. the routing choice) are passed to generate with every row.
+        """
+        with self._lock:
+            if job.running:
+                return False
+            job.running = True
+            job.settings = dict(settings or {})
+        todo = job.todo()
+        for index in todo:
+            job.attempts[index] = 0
+            job.set(index, PENDING)
+        if not todo:
+            job.running = False
+            return False
+        remaining = [len(todo)]
+
+        def finish_one():
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    job.running = False
+
+        for index in todo:
+            self._pool.submit(self._run_row, job, index, finish_one)
+        return True
+
+    def _run_row(self, job, index, finish_one):
+        try:
+            while True:
+                job.attempts[index] += 1
+                job.set(index, RUNNING)
+                try:
+                    text = self.generate(job.rows[index], job.settings)
+                    error = text if is_error_response(text) else None
+                except Exception as e:
+                    text, error = None, f"Error: {e}"
+                if error is None:
+                    job.set(index, DONE, result=text)
+                    return
+                if job.attempts[index] >= self.max_attempts:
+                    job.set(index, FAILED, error=error)
+                    return
+                job.set(index, PENDING, error=error)
+                time.sleep(self.retry_delay * job.attempts[index])
+        finally:
+            finish_one()
@@ -0,0 +1,104 @@
+"""Deterministic stand-in for Gemini models, used by the offline benchmarks.
+
+FakeBackend plugs into ClientPool through its model_factory /
+service_client_factory hooks, so the real LLMGateway, scheduler, cache and
+metrics code paths run unchanged while no request ever leaves the machine.
+"""
+import random
+import threading
+import time
+
+from google.api_core import exceptions
+
+from retrieval import estimate_tokens
+
+
+class FakeUsage:
+    def __init__(self, prompt_tokens, response_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = response_tokens
+
+
+class FakeChunk:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class FakeBackend:
+    """Shared configuration and call counters for every fake model.
+
+    latency_s / jitter_s: total response time (uniform jitter on top)
+    ttft_s: time to the first streamed chunk (defaults to a quarter of the latency)
+    error_rate: share of calls that raise ResourceExhausted (429)
+    response_words: size of every answer
+    model_latency: optional {model_name: latency_s} overrides
+    """
+
+    def __init__(self, latency_s=0.0, jitter_s=0.0, ttft_s=None, error_rate=0.0,
+                 response_words=150, chunk_words=12, model_latency=None, seed=1234):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.ttft_s = ttft_s
+        self.error_rate = error_rate
+        self.response_words = response_words
+        self.chunk_words = chunk_words
+        self.model_latency = model_latency or {}
+        self.calls = 0
+        self.injected_errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def model_factory(self, service_client, model_name, generation_config):
+        return FakeGenerativeModel(self, model_name)
+
+    @staticmethod
+    def service_client_factory(api_key):
+        return None
+
+    def draw(self, model_name):
+        """Returns (latency_s, should_fail) from the seeded generator."""
+        with self._lock:
+            self.calls += 1
+            base = self.model_latency.get(model_name, self.latency_s)
+            latency = base + (self._rng.uniform(0, self.jitter_s) if self.jitter_s else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.injected_errors += 1
+            return latency, fail
+
+    def answer(self, model_name):
+        return " ".join(f"{model_name}-token{i % 97}" for i in range(self.response_words))
+
+
+class FakeGenerativeModel:
+    def __init__(self, backend, model_name):
+        self.backend = backend
+        self.model_name = model_name
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        latency, fail = self.backend.draw(self.model_name)
+        if fail:
+            time.sleep(latency * 0.1)
+            raise exceptions.ResourceExhausted("Injected 429 from the fake backend")
+
+        text = self.backend.answer(self.model_name)
+        usage = FakeUsage(estimate_tokens(str(prompt)), estimate_tokens(text))
+        if not stream:
+            if latency:
+                time.sleep(latency)
+            return FakeChunk(text, usage)
+        return self._stream(text, usage, latency)
+
+    def _stream(self, text, usage, latency):
+        ttft = self.backend.ttft_s if self.backend.ttft_s is not None else latency / 4
+        words = text.split(" ")
+        size = self.backend.chunk_words
+        chunks = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+        if ttft:
+            time.sleep(ttft)
+        per_chunk = max(0.0, latency - ttft) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i and per_chunk:
+                time.sleep(per_chunk)
+            yield FakeChunk(chunk, usage if i == len(chunks) - 1 else None)
@@ -0,0 +1,407 @@
+"""Offline micro-benchmarks for the app's hot paths.
+
+Nothing here talks to the Gemini API: model calls go to the deterministic
+FakeBackend (configurable latency, 429 injection rate and response size).
+
+Usage, from the repository root:
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --out benchmarks/results/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/results/baseline.json --fail-on-regression
+    python -m benchmarks.run_benchmarks --rerun-budget-ms 150
+
+Results are written as JSON (mean / p50 / p95 latency in ms and peak traced
+allocation in KiB per benchmark) so two runs can be compared directly.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_gemini import FakeBackend  # noqa: E402
+from client_pool import ClientPool  # noqa: E402
+from context_cache import CachedPrompt, ContextCache, KnowledgePrefix, LocalContextBackend  # noqa: E402
+from knowledge_base import KnowledgeBase  # noqa: E402
+from llm import LLMGateway  # noqa: E402
+from memory import ConversationMemory, new_memory_state  # noqa: E402
+from metrics import MetricsRegistry  # noqa: E402
+from prompts import COUNCIL_PRESETS, QUICK_INSIGHTS, build_audit_prompt, build_standard_prompt  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from retrieval import CVIndex  # noqa: E402
+from scheduler import KeyScheduler  # noqa: E402
+from trace_store import new_trace_log  # noqa: E402
+
+FAKE_KEYS = ("bench-key-0001", "bench-key-0002", "bench-key-0003")
+MODELS = ["gemini-flash-latest", "gemini-2.5-flash-lite"]
+
+
+class UnthrottledScheduler(KeyScheduler):
+    """Real scheduler logic with quotas high enough that the benchmark itself is never paced."""
+
+    def __init__(self, api_keys, models, **kwargs):
+        kwargs.update(rpm=10 ** 9, burst=10 ** 9, cooldown_seconds=0.01, circuit_seconds=0.01)
+        super().__init__(api_keys, models, **kwargs)
+
+
+def load_cv_data():
+    """The knowledge base the app reads, without executing the Streamlit script."""
+    return KnowledgeBase(os.path.join(REPO_ROOT, "knowledge_base.json")).data
+
+
+def measure(fn, repeat):
+    """Times fn() `repeat` times, then traces allocations of one extra call."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return summarize(timings, peak / 1024)
+
+
+def summarize(timings, peak_kib):
+    timings = sorted(timings)
+    return {
+        "n": len(timings),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "p50_ms": round(timings[len(timings) // 2], 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+        "peak_kib": round(peak_kib, 1),
+    }
+
+
+def make_gateway(backend, cache=None, context_cache=None):
+    pool = ClientPool(model_factory=backend.model_factory, service_client_factory=backend.service_client_factory)
+    return LLMGateway(UnthrottledScheduler(FAKE_KEYS, MODELS), pool, cache=cache, metrics=MetricsRegistry(),
+                      context_cache=context_cache)
+
+
+def bench_prompt_construction(cv_data, repeat):
+    results = {"retrieval.build_index": measure(lambda: CVIndex(cv_data), repeat)}
+    index = CVIndex(cv_data)
+    questions = list(QUICK_INSIGHTS.values()) + list(COUNCIL_PRESETS.values())
+    results["retrieval.build_context"] = measure(
+        lambda: [index.build_context(q) for q in questions], repeat
+    )
+    question = questions[0]
+    context = index.build_context(question)
+    results["prompts.standard"] = measure(
+        lambda: build_standard_prompt("Kaan", context, "Technical & Precise", f"user: {question}", question), repeat
+    )
+    drafts = ["draft " * 200] * 3
+    results["prompts.audit_3_drafts"] = measure(
+        lambda: build_audit_prompt(context, drafts, "Technical & Precise"), repeat
+    )
+    return results
+
+
+def bench_memory(sizes, repeat):
+    results = {}
+    memory = ConversationMemory(600)
+    for size in sizes:
+        messages = [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " + "lorem ipsum " * 20}
+            for i in range(size)
+        ]
+        state = new_memory_state()
+        memory.build(messages, state, lambda previous, transcript: "summary of earlier turns")
+        results[f"memory.build[history={size}]"] = measure(
+            lambda: memory.build(messages, dict(state), lambda previous, transcript: "summary"), repeat
+        )
+    return results
+
+
+def bench_gateway(args):
+    results = {}
+    prompt = "QUESTION: " + "context " * 500
+    overhead = make_gateway(FakeBackend(response_words=args.response_words))
+    results["gateway.generate[overhead]"] = measure(lambda: overhead.generate(prompt, use_cache=False), args.repeat)
+
+    cache = ResponseCache(None)
+    cached = make_gateway(FakeBackend(response_words=args.response_words), cache=cache)
+    cached.generate(prompt, temperature=0.2)
+    results["gateway.generate[cache_hit]"] = measure(lambda: cached.generate(prompt, temperature=0.2), args.repeat)
+
+    # Same prompt split into a cached prefix and a short suffix (local stand-in for the provider cache)
+    prefix = KnowledgePrefix("context " * 490)
+    split_prompt = CachedPrompt(prefix, "QUESTION: " + "context " * 10, prompt)
+    context_cached = make_gateway(FakeBackend(response_words=args.response_words),
+                                  context_cache=ContextCache(LocalContextBackend()))
+    results["gateway.generate[context_cache]"] = measure(
+        lambda: context_cached.generate(split_prompt, use_cache=False), args.repeat
+    )
+
+    flaky = make_gateway(FakeBackend(latency_s=args.latency, error_rate=args.error_rate,
+                                     response_words=args.response_words))
+    results[f"gateway.generate[latency={args.latency}s,429={args.error_rate}]"] = measure(
+        lambda: flaky.generate(prompt, use_cache=False), max(3, args.repeat // 10)
+    )
+
+    streaming = make_gateway(FakeBackend(latency_s=args.latency, response_words=args.response_words))
+
+    def first_chunk():
+        stream = streaming.generate_stream(prompt, use_cache=False)
+        next(stream)
+        stream.close()
+
+    results[f"gateway.stream_ttft[latency={args.latency}s]"] = measure(first_chunk, max(3, args.repeat // 10))
+    return results
+
+
+def patch_app_for_offline_run(backend):
+    """Routes the Streamlit app's resources to the fake backend and to stores that stay
+    in memory or in a temporary directory, so a run never touches the app's .cache."""
+    import batch_jobs
+    import client_pool
+    import context_cache
+    import metrics
+    import precompute
+    import response_cache
+    import scheduler
+    import session_store
+    import trace_store
+
+    real_pool, real_cache, real_metrics = client_pool.ClientPool, response_cache.ResponseCache, metrics.MetricsRegistry
+    client_pool.ClientPool = lambda: real_pool(
+        model_factory=backend.model_factory, service_client_factory=backend.service_client_factory
+    )
+    response_cache.ResponseCache = lambda db_path, **kwargs: real_cache(None, **kwargs)
+    metrics.MetricsRegistry = lambda log_path=None, **kwargs: real_metrics(None, **kwargs)
+    scratch = tempfile.mkdtemp(prefix="bench-app-")
+    atexit.register(shutil.rmtree, scratch, ignore_errors=True)
+    real_traces, real_sessions = trace_store.TraceStore, session_store.SessionStore
+    real_runner, real_answers = batch_jobs.BatchRunner, precompute.PrecomputedAnswers
+    trace_store.TraceStore = lambda db_path: real_traces(os.path.join(scratch, os.path.basename(db_path)))
+    session_store.SessionStore = lambda db_path, **kwargs: real_sessions(
+        os.path.join(scratch, os.path.basename(db_path)), **kwargs
+    )
+    batch_jobs.BatchRunner = lambda generate, directory, **kwargs: real_runner(
+        generate, os.path.join(scratch, "batches"), **kwargs
+    )
+    precompute.PrecomputedAnswers = lambda version, path=None, grounding=None: real_answers(
+        version, path and os.path.join(scratch, os.path.basename(path)), grounding
+    )
+    scheduler.KeyScheduler = UnthrottledScheduler
+    context_cache.GeminiContextBackend = context_cache.LocalContextBackend
+    # The warm-up would compete with the measured calls for the fake backend
+    precompute.warm_up = lambda store, *args, **kwargs: store.finished.set()
+
+
+def bench_app(args):
+    """End-to-end script runs through Streamlit's AppTest harness."""
+    from streamlit.testing.v1 import AppTest
+
+    backend = FakeBackend(latency_s=args.latency, response_words=args.response_words)
+    patch_app_for_offline_run(backend)
+    app_path = os.path.join(REPO_ROOT, "app.py")
+    repeat = max(2, args.repeat // 20)
+    results = {}
+
+    def new_app(**session):
+        at = AppTest.from_file(app_path, default_timeout=120)
+        at.secrets["api_keys"] = list(FAKE_KEYS)
+        for name, value in session.items():
+            at.session_state[name] = value
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception)
+        return at
+
+    def settle(at):
+        """Reruns like the polling page does until no background task is left (no Stop button)."""
+        while any(button.label == "Stop" for button in at.button):
+            time.sleep(0.005)
+            at.run()
+        return at
+
+    at = new_app()
+    results["e2e.rerun_idle"] = measure(at.run, repeat)
+
+    counter = iter(range(10 ** 6))
+    for size in args.sizes:
+        history = [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "lorem ipsum " * 20}
+            for i in range(size)
+        ]
+        at = new_app(messages=list(history))
+        chat = at.chat_input[1]
+        results[f"e2e.standard_chat[history={size}]"] = measure(
+            lambda: settle(chat.set_value(f"Which projects used Java? ({next(counter)})").run()), repeat
+        )
+
+    for size in args.sizes:
+        logs = [
+            {"id": i + 1, "query": f"question {i}", "drafts": [{"text": "draft " * 100, "latency": 1.0}],
+             "final": "final " * 100, "timestamp": "12:00:00"}
+            for i in range(size)
+        ]
+        at = new_app(council_logs=new_trace_log(max(1, size), logs))
+        chat = at.chat_input[0]
+        results[f"e2e.council_chat[trace={size}]"] = measure(
+            lambda: settle(chat.set_value(f"How strong is his AI background? ({next(counter)})").run()), repeat
+        )
+
+    at = new_app()
+    at.text_input[0].set_value("ACME")
+    at.text_area[0].set_value("We need Python, Java and SQL experience. " * 10)
+    button = next(b for b in at.button if b.label == "Generate Cover Letter")
+    results["e2e.cover_letter"] = measure(lambda: settle(button.click().run()), repeat)
+
+    results["_fake_backend_calls"] = backend.calls
+    return results
+
+
+# Runs in a fresh interpreter; prints {"ms", "maxrss_kib", "modules"} as JSON
+STARTUP_PROBE = """
+import json, os, resource, sys, time
+started = time.perf_counter()
+target = sys.argv[1]
+if target == "app":
+    sys.path.insert(0, os.getcwd())
+    from benchmarks.run_benchmarks import FAKE_KEYS, patch_app_for_offline_run
+    from benchmarks.fake_gemini import FakeBackend
+    from streamlit.testing.v1 import AppTest
+    patch_app_for_offline_run(FakeBackend())
+    at = AppTest.from_file(os.path.join(os.getcwd(), "app.py"), default_timeout=120)
+    at.secrets["api_keys"] = list(FAKE_KEYS)
+    at.run()
+    if at.exception:
+        raise SystemExit(str(at.exception))
+else:
+    for name in target.split("+"):
+        __import__(name)
+print(json.dumps({
+    "ms": (time.perf_counter() - started) * 1000,
+    "maxrss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": [m for m in ("pandas", "plotly.express", "pyarrow") if m in sys.modules],
+}))
+sys.stdout.flush()
+os._exit(0)
+"""
+
+
+def bench_startup(args):
+    """Cold start: each sample is a fresh Python process (imports are not cached between samples)."""
+    results = {}
+    targets = {
+        "startup.import[streamlit]": "streamlit",
+        "startup.import[pandas+plotly.express]": "pandas+plotly.express",
+        "startup.first_page_render": "app",
+    }
+    for name, target in targets.items():
+        timings, peaks, modules = [], [], []
+        for _ in range(args.startup_runs):
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_PROBE, target],
+                cwd=REPO_ROOT, capture_output=True, text=True, timeout=300, check=True,
+            ).stdout
+            probe = json.loads(output.strip().splitlines()[-1])
+            timings.append(probe["ms"])
+            peaks.append(probe["maxrss_kib"])
+            modules = probe["modules"]
+        results[name] = summarize(timings, max(peaks))
+        if target == "app":
+            # The chart libraries should stay unloaded on a plain first page view
+            results["_startup_heavy_modules_loaded"] = modules
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Prints a delta table and returns the names that regressed beyond threshold."""
+    regressions = []
+    print(f"\n{'benchmark':55} {'baseline ms':>12} {'current ms':>12} {'delta':>8}")
+    for name, result in current.items():
+        base = baseline.get(name)
+        if not isinstance(result, dict) or not isinstance(base, dict):
+            continue
+        delta = (result["mean_ms"] - base["mean_ms"]) / base["mean_ms"] if base["mean_ms"] else 0.0
+        flag = ""
+        # Ignore sub-0.05 ms differences, they are timer noise
+        if delta > threshold and result["mean_ms"] - base["mean_ms"] > 0.05:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:55} {base['mean_ms']:12.3f} {result['mean_ms']:12.3f} {delta:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="iterations for micro benchmarks")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="share of fake calls that return 429")
+    parser.add_argument("--response-words", type=int, default=150)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 20, 200], help="history / trace sizes")
+    parser.add_argument("--skip-app", action="store_true", help="skip the end-to-end Streamlit runs")
+    parser.add_argument("--skip-startup", action="store_true", help="skip the cold-start (fresh process) runs")
+    parser.add_argument("--startup-runs", type=int, default=3, help="fresh processes per cold-start benchmark")
+    parser.add_argument("--out", default=os.path.join(REPO_ROOT, "benchmarks", "results", "latest.json"))
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--rerun-budget-ms", type=float, default=150.0,
+                        help="fail when an idle script rerun (e2e.rerun_idle p50, incl. AppTest overhead) is slower")
+    args = parser.parse_args(argv)
+
+    cv_data = load_cv_data()
+    results = {}
+    results.update(bench_prompt_construction(cv_data, args.repeat))
+    results.update(bench_memory(args.sizes, args.repeat))
+    results.update(bench_gateway(args))
+    if not args.skip_app:
+        results.update(bench_app(args))
+    if not args.skip_startup:
+        results.update(bench_startup(args))
+
+    for name, result in results.items():
+        if isinstance(result, dict):
+            print(f"{name:55} mean {result['mean_ms']:10.3f} ms  p95 {result['p95_ms']:10.3f} ms  peak {result['peak_kib']:9.1f} KiB")
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    payload = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    exit_code = 0
+    idle = results.get("e2e.rerun_idle")
+    if idle and idle["p50_ms"] > args.rerun_budget_ms:
+        print(f"\nIdle rerun p50 {idle['p50_ms']:.1f} ms is over the {args.rerun_budget_ms:.0f} ms budget")
+        exit_code = 1
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Deterministic fact-check of Visionary drafts against the CV.
+
+Checkable claims (GPA, course grades, graduation date, technologies, the tech
+used in a named project, years of experience) are pulled out of a draft with
+regular expressions and compared with cv_data. Assertions the CV has no field
+for (employers, team sizes, awards) cannot be checked and are flagged unless
+the CV states them word for word. A clean draft can skip the Auditor call; a
+draft with flagged spans only needs those spans corrected.
+
+`python claim_verifier.py` runs REGRESSION_CASES against knowledge_base.json.
+"""
+import json
+import re
+
+from retrieval import tokenize
+from skill_matcher import skills_in
+
+GRADE = re.compile(r"(?<![\d.,])([1-5][.,]\d)(?![\d%]|[.,]\d)")
+GPA_CLAIM = re.compile(r"\bGPA\b[^.\d]{0,30}?(\d[.,]\d{1,2})|(\d[.,]\d{1,2})\s*(?:\([^)]*\)\s*)?GPA\b", re.IGNORECASE)
+GRADUATION_CLAIM = re.compile(
+    r"graduat\w*[^.]{0,60}?\b(?:(spring|summer|fall|autumn|winter)\s+)?(20\d\d)\b", re.IGNORECASE
+)
+EXPERIENCE_CLAIM = re.compile(
+    r"\b\d+\+?\s+years?\s+of\s+(?:professional\s+|industry\s+|work\s+)?experience\b", re.IGNORECASE
+)
+# Employers, team sizes and awards: nothing in cv_data to check them against
+UNCHECKED_CLAIMS = (
+    re.compile(r"\b(?i:work\w*|intern\w*|employ\w*|engineers?|developers?|consultants?)\s+(?i:at|for)\s+[A-Z][\w&.-]*"),
+    re.compile(r"\bteam\s+of\s+\d+|\b(?:led|leads|leading|managed|manages|managing|supervis\w*|mentor\w*)\s+"
+               r"(?:a\s+|the\s+)?(?:team\b|\d+)", re.IGNORECASE),
+    re.compile(r"\b(?:won(?!')|wins|winner|awarded|awards?|prizes?|olympiads?|champion\w*|medals?|scholarships?|"
+               r"first\s+place|ranked\s+(?:first|top|#?\d+))\b", re.IGNORECASE),
+)
+# (draft, expected flagged count) for knowledge_base.json; drafts that were once misread
+REGRESSION_CASES = (
+    ("He earned a 1.3 in Object Oriented Programming with Java and a 1.7 in Real-time Systems.", 0),
+    ("He got 1.0 (C) and 1.3 (Java).", 0),
+    ("He got 1.0 in C programming and 1.3 in Java.", 0),
+    ("He got a 1.0 in Object Oriented Programming with Java.", 1),
+    ("Kaan led a team of 12 engineers at Google building Java and Python systems. He won the national AI olympiad.", 2),
+)
+# Claims compared with a CV value; a technology merely mentioned somewhere in the CV does not count
+CHECKED_KINDS = {"gpa", "grade", "graduation", "project_tech"}
+# "built the SUMO wrapper in Go": tech after one of these belongs to the project in the sentence
+TECH_ATTRIBUTION = re.compile(
+    r"\b(?:using|built (?:with|in)|written in|implemented (?:with|in)|developed (?:with|in)|powered by|based on)\b",
+    re.IGNORECASE,
+)
+CLAUSE_SPLIT = re.compile(r"[;\n]|,(?!\d)|(?<=[.!?])\s+|\s+and\s+")
+# "1.3 in Java", "1.3 for OOP", "1.3 (Java)": the course follows the grade
+GRADE_BEFORE_COURSE = re.compile(r"\s*(?:\(|(?:in|for)\b)", re.IGNORECASE)
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+# Course name words that do not tell one course from another
+GENERIC_COURSE_WORDS = {"introduction", "to", "programming", "with", "object", "oriented", "and", "the", "of",
+                        "in", "computer", "software", "data", "current", "focu"}
+
+
+def _number(text):
+    return float(text.replace(",", "."))
+
+
+def _tidy(segment):
+    span = re.sub(r"^[\W_]*(?:and|or)\s+", "", segment).strip(" ,.;:)(")
+    return span + ")" if span.count("(") > span.count(")") else span
+
+
+class Claim:
+    def __init__(self, kind, span, ok, expected=None):
+        self.kind = kind  # "gpa", "grade", "graduation", "technology", "project_tech", "experience", "unchecked"
+        self.span = span
+        self.ok = ok
+        self.expected = expected
+
+    def describe(self):
+        if self.ok:
+            return f"{self.kind}: {self.span}"
+        return f"{self.kind}: '{self.span}' (CV: {self.expected})"
+
+
+class ClaimReport:
+    def __init__(self, claims, min_verified=1):
+        self.claims = claims
+        self.min_verified = min_verified
+
+    @property
+    def verified(self):
+        return [c for c in self.claims if c.ok]
+
+    @property
+    def checked(self):
+        """Verified claims that were compared with a CV value."""
+        return [c for c in self.claims if c.ok and c.kind in CHECKED_KINDS]
+
+    @property
+    def flagged(self):
+        return [c for c in self.claims if not c.ok]
+
+    @property
+    def clean(self):
+        """No flagged claim and enough checked ones to trust the draft without an Auditor."""
+        return not self.flagged and len(self.checked) >= self.min_verified
+
+    def summary(self):
+        return {
+            "verified": [c.describe() for c in self.verified],
+            "flagged": [c.describe() for c in self.flagged],
+        }
+
+
+class ClaimVerifier:
+    """Indexes the checkable CV facts once; verify() costs about a millisecond per draft."""
+
+    def __init__(self, cv_data, min_verified=1):
+        self.min_verified = min_verified
+        education = cv_data.get("education", {})
+        gpa = re.search(r"\d[.,]\d+", str(education.get("gpa", "")))
+        self.gpa = _number(gpa.group()) if gpa else None
+        self.gpa_text = education.get("gpa")
+
+        self.courses = []  # (name, keywords, grade)
+        for course, grade in education.get("key_coursework_grades", {}).items():
+            keywords = set(tokenize(course)) - GENERIC_COURSE_WORDS
+            if "object" in course.lower() and "oriented" in course.lower():
+                keywords.add("oop")
+            if course.lower() == "artificial intelligence":
+                keywords.add("ai")
+            numeric = GRADE.fullmatch(str(grade).strip())
+            self.courses.append((course, keywords, _number(grade) if numeric else None))
+        self.known_grades = {grade for _, _, grade in self.courses if grade is not None}
+
+        self.graduation_text = education.get("current_status", "")
+        self.graduation_years = set(re.findall(r"20\d\d", self.graduation_text))
+        self.graduation_season = next(
+            (s for s in ("spring", "summer", "fall", "autumn", "winter") if s in self.graduation_text.lower()), None
+        )
+
+        self.cv_text = json.dumps(cv_data, ensure_ascii=False)
+        self.cv_lower = self.cv_text.lower()
+        self.cv_skills = skills_in(self.cv_text)
+        self.projects = []  # (aliases, skills, name)
+        for project in cv_data.get("projects", []):
+            name = project.get("name", "")
+            aliases = [name.split("(")[0].strip()] + re.findall(r"\(([^)]+)\)", name)
+            project_text = " ".join(str(v) for v in project.values())
+            self.projects.append(([a for a in aliases if a], skills_in(project_text), name))
+
+    def verify(self, text):
+        claims = []
+        claims += self._gpa_claims(text)
+        claims += self._grade_claims(text)
+        claims += self._graduation_claims(text)
+        claims += self._technology_claims(text)
+        claims += self._project_claims(text)
+        for match in EXPERIENCE_CLAIM.finditer(text):
+            if match.group().lower() not in self.cv_lower:
+                claims.append(Claim("experience", match.group(), False, "no professional experience listed"))
+        claims += self._unchecked_claims(text)
+        return ClaimReport(claims, self.min_verified)
+
+    def _unchecked_claims(self, text):
+        """One flagged claim per sentence asserting something the CV cannot confirm."""
+        claims = []
+        for sentence in SENTENCE_SPLIT.split(text):
+            matches = [m.group() for pattern in UNCHECKED_CLAIMS for m in pattern.finditer(sentence)]
+            if any(m.lower() not in self.cv_lower for m in matches):
+                claims.append(Claim("unchecked", _tidy(sentence), False, "nothing in the CV supports this"))
+        return claims
+
+    def _gpa_claims(self, text):
+        claims = []
+        for match in GPA_CLAIM.finditer(text):
+            value = _number(match.group(1) or match.group(2))
+            claims.append(Claim("gpa", match.group().strip(), self.gpa is not None and value == self.gpa, self.gpa_text))
+        return claims
+
+    def _course_for(self, segment):
+        """(name, grade) of the one course the segment names, None if it names none or is ambiguous."""
+        words = set(tokenize(segment))
+        overlaps = sorted(((len(keywords & words), name, grade) for name, keywords, grade in self.courses),
+                          reverse=True)
+        if not overlaps or not overlaps[0][0] or (len(overlaps) > 1 and overlaps[1][0] == overlaps[0][0]):
+            return None
+        return overlaps[0][1], overlaps[0][2]
+
+    def _grade_claims(self, text):
+        """Each grade is checked against the course it is written with.
+
+        "<grade> in <course>" and "<grade> (<course>)" look right after the grade,
+        "<course> (<grade>)" and "<course>: <grade>" right before it; the other side is the fallback.
+        """
+        gpa_spans = [match.span() for match in GPA_CLAIM.finditer(text)]
+        splits = list(CLAUSE_SPLIT.finditer(text))
+        starts = [0] + [match.end() for match in splits]
+        ends = [match.start() for match in splits] + [len(text)]
+        claims = []
+        for offset, clause_end in zip(starts, ends):
+            clause = text[offset:clause_end]
+            matches = list(GRADE.finditer(clause))
+            for i, match in enumerate(matches):
+                if any(start <= offset + match.start() < end for start, end in gpa_spans):
+                    continue
+                before = clause[matches[i - 1].end() if i else 0:match.end()]
+                after = clause[match.start():matches[i + 1].start() if i + 1 < len(matches) else len(clause)]
+                wrapped = clause[:match.start()].rstrip().endswith("(")
+                forward = not wrapped and GRADE_BEFORE_COURSE.match(clause, match.end())
+                course, segment = None, before
+                for segment in ((after, before) if forward else (before, after)):
+                    course = self._course_for(segment)
+                    if course is not None:
+                        break
+                value = _number(match.group(1))
+                if course and course[1] is not None:
+                    claims.append(Claim("grade", _tidy(segment), value == course[1], f"{course[0]}: {course[1]}"))
+                elif course is None and "grade" in clause.lower() and value not in self.known_grades:
+                    claims.append(Claim("grade", _tidy(before), False, "no course with this grade"))
+        return claims
+
+    def _graduation_claims(self, text):
+        claims = []
+        for match in GRADUATION_CLAIM.finditer(text):
+            season, year = match.group(1), match.group(2)
+            ok = year in self.graduation_years and (
+                not season or not self.graduation_season or season.lower() == self.graduation_season
+            )
+            claims.append(Claim("graduation", match.group().strip(), ok, self.graduation_text))
+        return claims
+
+    def _technology_claims(self, text):
+        claims = []
+        for skill in sorted(skills_in(text)):
+            ok = skill in self.cv_skills
+            claims.append(Claim("technology", skill, ok, None if ok else "not in the CV"))
+        return claims
+
+    def _project_claims(self, text):
+        """Tech attributed to exactly one named project ("SUMO wrapper built with Go") must be in its stack."""
+        claims = []
+        for sentence in SENTENCE_SPLIT.split(text):
+            mentioned = [p for p in self.projects if any(a.lower() in sentence.lower() for a in p[0])]
+            if len(mentioned) != 1:
+                continue
+            aliases, project_skills, name = mentioned[0]
+            attribution = TECH_ATTRIBUTION.search(sentence)
+            if not attribution:
+                continue
+            for skill in sorted(skills_in(sentence[attribution.start():])):
+                ok = skill in project_skills
+                claims.append(Claim("project_tech", f"{skill} in {name}", ok, None if ok else "not in this project's stack"))
+        return claims
+
+
+if __name__ == "__main__":
+    with open("knowledge_base.json", "r", encoding="utf-8") as f:
+        verifier = ClaimVerifier(json.load(f))
+    failures = 0
+    for draft, expected in REGRESSION_CASES:
+        report = verifier.verify(draft)
+        if len(report.flagged) != expected:
+            failures += 1
+            print(f"FAIL ({len(report.flagged)} flagged, expected {expected}): {draft}\n  {report.summary()}")
+    print(f"{len(REGRESSION_CASES) - failures}/{len(REGRESSION_CASES)} claim check cases pass")
+    raise SystemExit(1 if failures else 0)
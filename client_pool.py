@@ -0,0 +1,55 @@
+"""Per-key Gemini clients that are built once and reused across sessions.
+
+genai.configure() mutates a process-wide default client, so two sessions
+configuring different keys at the same time can end up sending each other's
+requests with the wrong key. Here every API key gets its own service client
+(and connection), and every (key, model, generation config) gets one
+GenerativeModel bound to it, without touching the SDK's global state.
+"""
+import threading
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+
+def make_sdk_model(service_client, model_name, generation_config):
+    model = genai.GenerativeModel(model_name, generation_config=genai.GenerationConfig(**generation_config))
+    # The SDK only exposes the global default client; binding our own keeps the key per model
+    model._client = service_client
+    return model
+
+
+def make_service_client(api_key):
+    manager = genai_client._ClientManager()
+    manager.configure(api_key=api_key)
+    return manager.make_client("generative")
+
+
+class ClientPool:
+    def __init__(self, model_factory=make_sdk_model, service_client_factory=make_service_client):
+        self.model_factory = model_factory
+        self.service_client_factory = service_client_factory
+        self._service_clients = {}
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get_model(self, api_key, model_name, **generation_config):
+        cache_key = (api_key, model_name, tuple(sorted(generation_config.items())))
+        model = self._models.get(cache_key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(cache_key)
+            if model is None:
+                service_client = self._service_clients.get(api_key)
+                if service_client is None:
+                    service_client = self.service_client_factory(api_key)
+                    self._service_clients[api_key] = service_client
+                model = self.model_factory(service_client, model_name, generation_config)
+                self._models[cache_key] = model
+            return model
+
+    def stats(self):
+        with self._lock:
+            return {"service_clients": len(self._service_clients), "models": len(self._models)}
@@ -0,0 +1,167 @@
+"""Source browser for the Code Vault tab.
+
+Each vault file is split once into sections (one per top-level function,
+class or Java method, plus the code between them) and indexed for symbol and
+line search, so the tab only ever sends the visible slice to the browser.
+"""
+import ast
+import re
+
+# Words that open a braced block but are not a function / method definition
+NON_DEFINITION_WORDS = {"if", "for", "while", "switch", "catch", "else", "do", "try", "return", "synchronized", "new"}
+SIGNATURE = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+CLASS_DECLARATION = re.compile(r"\b(?:class|interface|enum|struct)\s+([A-Za-z_][A-Za-z0-9_]*)")
+
+
+class Section:
+    def __init__(self, name, kind, start, end):
+        self.name = name
+        self.kind = kind  # "function", "class" or "code"
+        self.start = start  # 1-based, inclusive
+        self.end = end
+
+
+def _strip_literals(line):
+    """Drops string/char literals and // comments so braces inside them are not counted."""
+    line = re.sub(r'"(?:\\.|[^"\\])*"', '""', line)
+    line = re.sub(r"'(?:\\.|[^'\\])*'", "''", line)
+    return line.split("//", 1)[0]
+
+
+def _definition_name(line):
+    code = line.strip()
+    if not code or code.startswith(("#", "*", "/*", "@")) or code.endswith(";"):
+        return None
+    match = SIGNATURE.search(code)
+    if not match or match.group(1) in NON_DEFINITION_WORDS:
+        return None
+    if code.split("(", 1)[0].split()[0] in NON_DEFINITION_WORDS:
+        return None
+    return match.group(1)
+
+
+def brace_sections(lines, member_depth):
+    """Definitions that open at member_depth (0: C/C++ functions, 1: Java methods)."""
+    sections = []
+    depth = 0
+    current = None
+    for number, line in enumerate(lines, start=1):
+        code = _strip_literals(line)
+        if current is None and depth == member_depth and "{" in code:
+            name = _definition_name(code)
+            if name is None and member_depth == 0:
+                match = CLASS_DECLARATION.search(code)
+                name = match.group(1) if match else None
+            if name:
+                current = Section(name, "function", number, number)
+        depth += code.count("{") - code.count("}")
+        if current is not None and depth <= member_depth:
+            current.end = number
+            sections.append(current)
+            current = None
+    return sections
+
+
+def python_sections(text):
+    sections = []
+    try:
+        tree = ast.parse(text)
+    except SyntaxError:
+        return sections
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            kind = "class" if isinstance(node, ast.ClassDef) else "function"
+            sections.append(Section(node.name, kind, start, node.end_lineno))
+    return sections
+
+
+def fill_gaps(definitions, lines):
+    """Adds "code" sections for the lines between definitions so the sections cover the file.
+
+    Blank-only gaps are folded into the preceding section instead.
+    """
+    sections = []
+    position = 1
+    for section in sorted(definitions, key=lambda s: s.start) + [None]:
+        end = section.start - 1 if section else len(lines)
+        if end >= position:
+            if sections and not any(line.strip() for line in lines[position - 1:end]):
+                sections[-1].end = end
+            else:
+                sections.append(Section(f"lines {position}-{end}", "code", position, end))
+        if section:
+            sections.append(section)
+            position = section.end + 1
+    return sections
+
+
+class VaultFile:
+    def __init__(self, label, path, language, text):
+        self.label = label
+        self.path = path
+        self.language = language
+        self.lines = text.splitlines()
+        if language == "python":
+            definitions = python_sections(text)
+        else:
+            definitions = brace_sections(self.lines, member_depth=1 if language == "java" else 0)
+        self.sections = fill_gaps(definitions, self.lines)
+
+    def excerpt(self, start, end):
+        return "\n".join(self.lines[start - 1:end])
+
+    def page_count(self, page_size):
+        return max(1, -(-len(self.lines) // page_size))
+
+    def page(self, number, page_size):
+        """Returns (start, end, text) for a 1-based page number."""
+        start = (number - 1) * page_size + 1
+        end = min(len(self.lines), start + page_size - 1)
+        return start, end, self.excerpt(start, end)
+
+    def section_at(self, line):
+        for section in self.sections:
+            if section.start <= line <= section.end:
+                return section
+        return self.sections[-1] if self.sections else Section("empty", "code", 1, 0)
+
+
+class CodeVault:
+    """All vault files with a shared symbol / line search index."""
+
+    def __init__(self, files):
+        # files: [(label, path, language, text)]
+        self.files = {label: VaultFile(label, path, language, text) for label, path, language, text in files}
+        self._symbols = [
+            (section.name.lower(), label, section)
+            for label, vault_file in self.files.items()
+            for section in vault_file.sections
+            if section.kind != "code"
+        ]
+
+    def search(self, query, limit=30):
+        """Symbol matches first (exact, then prefix, then substring), then matching lines.
+
+        Returns [(label, line, description)].
+        """
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        ranked = sorted(
+            (
+                (0 if name == needle else 1 if name.startswith(needle) else 2, label, section)
+                for name, label, section in self._symbols
+                if needle in name
+            ),
+            key=lambda hit: (hit[0], hit[2].start),
+        )
+        hits = [(label, section.start, f"{section.kind} {section.name}") for _, label, section in ranked]
+        seen = {(label, line) for label, line, _ in hits}
+        for label, vault_file in self.files.items():
+            for number, line in enumerate(vault_file.lines, start=1):
+                if len(hits) >= limit:
+                    return hits
+                if needle in line.lower() and (label, number) not in seen:
+                    hits.append((label, number, line.strip()[:80]))
+        return hits[:limit]
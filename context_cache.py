@@ -0,0 +1,247 @@
+"""Provider-side context caching for the static CV prefix.
+
+Prompts that carry the CV are split into a stable prefix (the knowledge base
+and the shared role instructions) and a short per-request suffix. The prefix
+is uploaded once per (API key, model) as Gemini cached content and only the
+suffix is sent with each call; the handle is re-created when it is about to
+expire or the CV changes. Wherever no cache can be used (creation failed,
+model not supported) the self-contained inline prompt is sent instead.
+
+LocalContextBackend is an in-process stand-in that keeps the prefix itself
+and prepends it before calling the model, so the whole path runs offline.
+"""
+import hashlib
+import itertools
+import threading
+import time
+from collections import Counter
+
+import google.generativeai as genai
+from google.api_core import exceptions
+from google.generativeai import caching
+from google.generativeai import client as genai_client
+
+from retrieval import estimate_tokens
+
+
+class KnowledgePrefix:
+    def __init__(self, text, system_instruction=""):
+        self.text = text
+        self.system_instruction = system_instruction
+        self.version = hashlib.sha256((system_instruction + "\n" + text).encode("utf-8")).hexdigest()[:12]
+        self.tokens = estimate_tokens(system_instruction + text)
+
+
+class CachedPrompt:
+    """suffix goes with a cached prefix; inline is the same request as one self-contained prompt."""
+
+    def __init__(self, prefix, suffix, inline):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.inline = inline
+
+
+def prompt_text(prompt):
+    """The full text of a prompt, for routing and token estimates."""
+    return prompt.inline if isinstance(prompt, CachedPrompt) else prompt
+
+
+def prompt_cache_text(prompt):
+    """What the response cache keys a prompt on.
+
+    Behind a cached prefix the model reads the whole CV, not only the sections
+    in the inline text, so the prefix version is part of the key.
+    """
+    if isinstance(prompt, CachedPrompt):
+        return f"[prefix {prompt.prefix.version}]\n{prompt.inline}"
+    return prompt
+
+
+class ContextCache:
+    """Process-wide registry of cached-content handles, one per (API key, model).
+
+    A pair whose cache could not be created is served inline for retry_seconds
+    before creation is tried again.
+    """
+
+    def __init__(self, backend, ttl_seconds=3600, refresh_margin_seconds=120, retry_seconds=1800):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_seconds = retry_seconds
+        self.counters = Counter()
+        self._handles = {}  # (api_key, model_name) -> {"name", "version", "expires_at"}
+        self._unavailable = {}  # (api_key, model_name) -> time.time() until which we send inline
+        self._pair_locks = {}
+        self._lock = threading.Lock()
+
+    def _pair_lock(self, pair):
+        with self._lock:
+            return self._pair_locks.setdefault(pair, threading.Lock())
+
+    def handle(self, api_key, model_name, prefix):
+        """Name of a live cache holding prefix for this pair (created if needed), or None."""
+        pair = (api_key, model_name)
+        now = time.time()
+        with self._lock:
+            current = self._handles.get(pair)
+            if current and current["version"] == prefix.version and current["expires_at"] - now > self.refresh_margin_seconds:
+                return current["name"]
+            if self._unavailable.get(pair, 0) > now:
+                return None
+
+        # One creation per pair at a time; other callers wait and reuse its result
+        with self._pair_lock(pair):
+            with self._lock:
+                current = self._handles.get(pair)
+                if current and current["version"] == prefix.version and current["expires_at"] - now > self.refresh_margin_seconds:
+                    return current["name"]
+            try:
+                name, expires_at = self.backend.create(api_key, model_name, prefix, self.ttl_seconds)
+            except Exception as e:
+                print(f"Context cache unavailable for {model_name}, Key...{api_key[-4:]}: {e}")
+                with self._lock:
+                    self._unavailable[pair] = time.time() + self.retry_seconds
+                    self.counters["create_failures"] += 1
+                return None
+            with self._lock:
+                previous = self._handles.get(pair)
+                self._handles[pair] = {"name": name, "version": prefix.version, "expires_at": expires_at}
+                self.counters["recreated" if previous else "created"] += 1
+        if previous and previous["name"] != name:
+            self._delete(api_key, previous["name"])
+        return name
+
+    def _delete(self, api_key, name):
+        try:
+            self.backend.delete(api_key, name)
+        except Exception as e:
+            print(f"Could not delete cached content {name}: {e}")
+
+    def bind(self, model, api_key, model_name, prompt):
+        """(model, contents) for one attempt: the cached model and the suffix, or the plain model and inline text."""
+        name = self.handle(api_key, model_name, prompt.prefix)
+        with self._lock:
+            if name is None:
+                self.counters["inline"] += 1
+                return model, prompt.inline
+            self.counters["cached_calls"] += 1
+            self.counters["prefix_tokens_reused"] += prompt.prefix.tokens
+        return self.backend.bind(model, name, prompt.prefix), prompt.suffix
+
+    def invalidate(self, api_key, model_name, name=None):
+        """Forgets a handle the provider rejected (e.g. expired early), so the next call re-creates it."""
+        with self._lock:
+            current = self._handles.get((api_key, model_name))
+            if current and (name is None or current["name"] == name):
+                del self._handles[(api_key, model_name)]
+                self.counters["invalidated"] += 1
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            stats = dict(self.counters)
+            stats["live_handles"] = sum(1 for h in self._handles.values() if h["expires_at"] > now)
+            stats["unavailable_pairs"] = sum(1 for until in self._unavailable.values() if until > now)
+        return stats
+
+
+# --- Backends ---
+
+def make_cache_client(api_key):
+    manager = genai_client._ClientManager()
+    manager.configure(api_key=api_key)
+    return manager.make_client("cache")
+
+
+class GeminiContextBackend:
+    """Gemini cached-content API, with one cache service client per API key."""
+
+    def __init__(self, cache_client_factory=make_cache_client):
+        self.cache_client_factory = cache_client_factory
+        self._clients = {}
+        self._bound = {}
+        self._lock = threading.Lock()
+
+    def _client(self, api_key):
+        with self._lock:
+            if api_key not in self._clients:
+                self._clients[api_key] = self.cache_client_factory(api_key)
+            return self._clients[api_key]
+
+    def create(self, api_key, model_name, prefix, ttl_seconds):
+        request = caching.CachedContent._prepare_create_request(
+            model=model_name,
+            display_name=f"cv-{prefix.version}",
+            system_instruction=prefix.system_instruction or None,
+            contents=[prefix.text],
+            ttl=int(ttl_seconds),
+        )
+        response = self._client(api_key).create_cached_content(request)
+        return response.name, response.expire_time.timestamp()
+
+    def delete(self, api_key, name):
+        with self._lock:
+            for bound_key in [k for k in self._bound if k[1] == name]:
+                del self._bound[bound_key]
+        self._client(api_key).delete_cached_content(name=name)
+
+    def bind(self, model, name, prefix):
+        with self._lock:
+            bound = self._bound.get((id(model), name))
+            if bound is None:
+                bound = genai.GenerativeModel(model.model_name, generation_config=model._generation_config)
+                # Same per-key service client as the plain model (see client_pool.py)
+                bound._client = model._client
+                bound._cached_content = name
+                self._bound[(id(model), name)] = bound
+            return bound
+
+
+class LocalContextBackend:
+    """Offline stand-in: keeps prefixes in memory and prepends them before calling the real model.
+
+    Expired or deleted handles raise NotFound like the provider does, and every
+    call through a handle is counted as a cache hit.
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self._entries = {}  # name -> (prefix, expires_at)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, api_key, model_name, prefix, ttl_seconds):
+        name = f"local/{prefix.version}-{next(self._ids)}"
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            self._entries[name] = (prefix, expires_at)
+            self.counters["created"] += 1
+        return name, expires_at
+
+    def delete(self, api_key, name):
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def bind(self, model, name, prefix):
+        return LocalCachedModel(self, model, name)
+
+    def resolve(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry[1] <= time.time():
+                raise exceptions.NotFound(f"Cached content {name} not found or expired")
+            self.counters["hits"] += 1
+            return entry[0]
+
+
+class LocalCachedModel:
+    def __init__(self, backend, model, name):
+        self.backend = backend
+        self.model = model
+        self.name = name
+
+    def generate_content(self, contents, **kwargs):
+        prefix = self.backend.resolve(self.name)
+        parts = [part for part in (prefix.system_instruction, prefix.text, contents) if part]
+        return self.model.generate_content("\n".join(parts), **kwargs)
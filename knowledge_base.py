@@ -0,0 +1,88 @@
+"""File-backed CV knowledge base.
+
+The CV lives in a JSON file instead of a literal in the app, so it can be
+edited without a redeploy. snapshot() re-reads the file only when its mtime or
+size changed, and versions every load by a hash of the serialized content;
+that version is what derived artifacts (indexes, prompt prefixes, cached
+answers) are keyed on, so they are rebuilt exactly when the content changes.
+A file that fails to parse after an edit keeps the last good version live.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def serialize(data):
+    """The CV as it goes into prompts (and into the version hash)."""
+    return json.dumps(data, indent=2)
+
+
+def content_version(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+class KnowledgeBase:
+    """The current (data, text, version) of a JSON file, shared by every session."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.text = None
+        self.version = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.last_error = None
+        self._stamp = None
+        self._lock = threading.Lock()
+        # The first load has no previous version to fall back to, so its errors are raised
+        self.snapshot()
+
+    def _read(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.path} must contain a JSON object")
+        return data
+
+    def snapshot(self):
+        """(data, text, version), re-read first if the file changed since the last call."""
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            if self.data is None:
+                raise
+            self.last_error = str(e)
+            return self.data, self.text, self.version
+
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    data = self._read()
+                except (OSError, ValueError) as e:
+                    if self.data is None:
+                        raise
+                    print(f"Keeping knowledge base version {self.version}, {self.path} could not be loaded: {e}")
+                    self.last_error = str(e)
+                else:
+                    text = serialize(data)
+                    version = content_version(text)
+                    if self.version is not None and version != self.version:
+                        self.reloads += 1
+                    self.data, self.text, self.version = data, text, version
+                    self.loaded_at = time.time()
+                    self.last_error = None
+                # A broken file is not parsed again until it is saved again
+                self._stamp = stamp
+            return self.data, self.text, self.version
+
+    def status(self):
+        return {
+            "path": self.path,
+            "version": self.version,
+            "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.loaded_at)) if self.loaded_at else None,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
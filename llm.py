@@ -0,0 +1,401 @@
+"""LLM access layer: response cache + key/model scheduling around the Gemini SDK."""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from google.api_core import exceptions
+
+from admission import BUSY_MESSAGE, PRIORITY_HEAVY
+from context_cache import CachedPrompt, prompt_cache_text, prompt_text
+from retrieval import estimate_tokens
+
+OUT_OF_LIMIT_MESSAGE = "Error: System is out of Limit. Resources are empty"
+CANCELLED_MESSAGE = "Error: Request cancelled"
+
+
+def usage_tokens(response, prompt, text):
+    """(prompt_tokens, response_tokens) from usage_metadata, estimated when missing."""
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt)
+    response_tokens = getattr(usage, "candidates_token_count", 0) or estimate_tokens(text)
+    return prompt_tokens, response_tokens
+
+
+def chunk_text(chunk):
+    try:
+        return chunk.text
+    except ValueError:
+        # Chunks without text parts (e.g. only safety metadata)
+        return ""
+
+
+class LLMGateway:
+    """Process-wide entry point for every model call the app makes.
+
+    With hedge=True, an attempt that has not answered (or, when streaming,
+    produced its first chunk) within a deadline taken from the observed
+    latency percentile gets a backup request on another (key, model) pair.
+    The first one to succeed wins. Hedges are capped at hedge_max_ratio of
+    all primary attempts so they cannot eat the quota.
+    """
+
+    def __init__(self, scheduler, clients, cache=None, cache_max_temperature=0.8, metrics=None,
+                 hedge=False, hedge_percentile=0.95, hedge_default_delay=4.0, hedge_min_delay=0.5,
+                 hedge_max_ratio=0.1, hedge_min_samples=20, hedge_workers=16, context_cache=None, admission=None):
+        self.scheduler = scheduler
+        self.clients = clients
+        self.cache = cache
+        self.context_cache = context_cache
+        self.admission = admission
+        self.cache_max_temperature = cache_max_temperature
+        self.metrics = metrics
+
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_ratio = hedge_max_ratio
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_counters = Counter()
+        self._hedge_lock = threading.Lock()
+        # Every primary and backup attempt runs here, so size it above the number of calls in flight
+        self._executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="llm-hedge") if hedge else None
+
+    def _record(self, **fields):
+        if self.metrics is not None:
+            self.metrics.record(**fields)
+
+    def _cache_lookup(self, prompt, temperature, use_cache, models=None):
+        """Returns (cache_status, cached_text) where cache_status is hit/miss/bypass.
+
+        Entries are keyed on the model that answered; only the routed preferred
+        model's answer is served, so a call routed to the strong model never
+        gets one the fast model wrote.
+        """
+        if self.cache is None:
+            return "bypass", None
+        if not use_cache or temperature > self.cache_max_temperature:
+            self.cache.record_bypass()
+            return "bypass", None
+        cached = self.cache.get(prompt, temperature, (models or self.scheduler.models)[0])
+        return ("hit" if cached is not None else "miss"), cached
+
+    def _model(self, key, model_name, temperature):
+        return self.clients.get_model(key, model_name, temperature=temperature)
+
+    # --- Attempts ---
+
+    def _bind(self, key, model_name, temperature, prompt):
+        """(model, contents) for one attempt; a CachedPrompt only sends its suffix when a cache is live."""
+        model = self._model(key, model_name, temperature)
+        if not isinstance(prompt, CachedPrompt):
+            return model, prompt
+        if self.context_cache is None:
+            return model, prompt.inline
+        return self.context_cache.bind(model, key, model_name, prompt)
+
+    def _start(self, key, model_name, retry, opener, prompt, temperature, labels):
+        """Runs opener(model, contents) on one pair. Returns (started, result), or None after recording the failure."""
+        started = time.monotonic()
+        contents = None
+        try:
+            model, contents = self._bind(key, model_name, temperature, prompt)
+            return started, opener(model, contents)
+
+        except exceptions.ResourceExhausted:
+            # 429 Error (Cota Limit)
+            self.scheduler.release(key, model_name, ok=False, rate_limited=True)
+            self._record(model=model_name, key=key, outcome="rate_limited", latency_s=time.monotonic() - started,
+                         retry=retry, **labels)
+            print(f"Cota Full! Model: {model_name}, Key...{key[-4:]}. Back-up System starts...")
+
+        except Exception as e:
+            latency = time.monotonic() - started
+            self.scheduler.release(key, model_name, ok=False, latency=latency)
+            self._record(model=model_name, key=key, outcome="error", latency_s=latency, retry=retry, **labels)
+            if isinstance(prompt, CachedPrompt) and contents is prompt.suffix:
+                # The cached content may be gone on the provider side; re-create it next time
+                self.context_cache.invalidate(key, model_name)
+            print(f"Error: {e}. Trying Alternatives.")
+        return None
+
+    def _first_success(self, opener, prompt, temperature, labels, models=None, cancel=None):
+        """Walks scheduler-assigned pairs (never the same pair twice) until opener succeeds.
+
+        models is the preference order (default: the scheduler's pool order).
+        Returns (key, model_name, retry, started, result) or None when every
+        pair failed or is unavailable, or the cancel event was set before the next attempt.
+        """
+        models = list(models) if models else self.scheduler.models
+        tried = set()
+        retry = 0
+        while len(tried) < len(self.scheduler):
+            pair = self.scheduler.acquire(models=models, exclude=tried, cancel=cancel)
+            if pair is None:
+                return None
+            tried.add(pair)
+            if self._executor is None:
+                attempt = self._start(*pair, retry, opener, prompt, temperature, labels)
+                winner = (pair, attempt) if attempt else None
+            else:
+                winner = self._hedged(pair, tried, retry, opener, prompt, temperature, labels, models, cancel)
+            if winner:
+                (key, model_name), (started, result) = winner
+                return key, model_name, retry, started, result
+            retry += 1
+        return None
+
+    # --- Hedging ---
+
+    def hedge_delay(self, model_name, first_token):
+        observed = None
+        if self.metrics is not None:
+            observed = self.metrics.latency_percentile(
+                model_name, self.hedge_percentile, first_token=first_token, min_samples=self.hedge_min_samples
+            )
+        return max(self.hedge_min_delay, observed if observed is not None else self.hedge_default_delay)
+
+    def _hedge_allowed(self):
+        with self._hedge_lock:
+            if self.hedge_counters["fired"] + 1 > self.hedge_max_ratio * self.hedge_counters["primaries"]:
+                self.hedge_counters["skipped_budget"] += 1
+                return False
+            return True
+
+    def _hedged(self, pair, tried, retry, opener, prompt, temperature, labels, models, cancel=None):
+        with self._hedge_lock:
+            self.hedge_counters["primaries"] += 1
+        running = threading.Event()
+
+        def run_primary():
+            running.set()
+            return self._start(*pair, retry, opener, prompt, temperature, labels)
+
+        primary = self._executor.submit(run_primary)
+        # The deadline counts from when the request goes out, not from when a worker became free.
+        # A call cancelled while its primary still waits for a worker gives the worker up.
+        while not running.wait(0.1):
+            if cancel is not None and cancel.is_set() and primary.cancel():
+                self.scheduler.unused(*pair)
+                return None
+        try:
+            attempt = primary.result(timeout=self.hedge_delay(pair[1], labels["stream"]))
+            return (pair, attempt) if attempt else None
+        except FuturesTimeout:
+            pass
+
+        # Prefer the next model in the pool (a slow model is usually slow on every key).
+        # Backups must not wait for a token: a slow hedge is worse than none.
+        position = models.index(pair[1]) + 1 if pair[1] in models else 0
+        backup_pair = None
+        if (cancel is None or not cancel.is_set()) and self._hedge_allowed():
+            backup_pair = self.scheduler.acquire(models=models[position:] + models[:position], exclude=tried, max_wait=0)
+        if backup_pair is None:
+            attempt = primary.result()
+            return (pair, attempt) if attempt else None
+
+        tried.add(backup_pair)
+        with self._hedge_lock:
+            self.hedge_counters["fired"] += 1
+        backup = self._executor.submit(self._start, *backup_pair, retry, opener, prompt, temperature, labels)
+        pairs = {primary: pair, backup: backup_pair}
+
+        winner = None
+        pending = set(pairs)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempt = future.result()
+                if not attempt:
+                    continue
+                if winner is None:
+                    winner = (pairs[future], attempt)
+                    with self._hedge_lock:
+                        self.hedge_counters["hedge_won" if future is backup else "primary_won"] += 1
+                else:
+                    self._discard(pairs[future], retry, labels, future)
+
+        # The loser cannot be interrupted mid-request; its result is dropped when it lands
+        for future in pending:
+            future.add_done_callback(lambda f, p=pairs[future]: self._discard(p, retry, labels, f))
+        return winner
+
+    def _discard(self, pair, retry, labels, future):
+        attempt = future.result()
+        if not attempt:
+            return
+        started, result = attempt
+        latency = time.monotonic() - started
+        self.scheduler.release(*pair, ok=True, latency=latency)
+        self._record(model=pair[1], key=pair[0], outcome="hedge_cancelled", latency_s=latency, retry=retry, **labels)
+        stream = result[2] if labels["stream"] else None
+        if hasattr(stream, "close"):
+            stream.close()
+
+    def hedge_stats(self):
+        with self._hedge_lock:
+            stats = dict(self.hedge_counters)
+        fired = stats.get("fired", 0)
+        stats["hedge_win_rate"] = round(stats.get("hedge_won", 0) / fired, 3) if fired else None
+        stats["deadlines_s"] = {m: round(self.hedge_delay(m, False), 2) for m in self.scheduler.models}
+        return stats
+
+    # --- Public API ---
+
+    def _cancelled(self, cancel, labels):
+        """Records a call given up because its caller cancelled it (no further attempt was made)."""
+        if cancel is None or not cancel.is_set():
+            return False
+        self._record(model=None, key=None, outcome="cancelled", latency_s=0.0, **labels)
+        return True
+
+    def _admit(self, session_id, priority, cancel, on_position, labels):
+        """(ticket, refusal) for a call that missed the cache.
+
+        ticket is None without an admission controller; refusal is the answer for a call turned away.
+        """
+        if self.admission is None:
+            return None, None
+        started = time.monotonic()
+        ticket = self.admission.acquire(session_id, priority, cancel=cancel, on_position=on_position)
+        if ticket is not None:
+            return ticket, None
+        if self._cancelled(cancel, labels):
+            return None, CANCELLED_MESSAGE
+        self._record(model=None, key=None, outcome="rejected", latency_s=time.monotonic() - started, **labels)
+        return None, BUSY_MESSAGE
+
+    def _release(self, ticket, winner, cancel):
+        if ticket is not None:
+            # No pair could serve an uncancelled call: every key is rate-limited or broken
+            self.admission.release(ticket, overloaded=winner is None and not (cancel is not None and cancel.is_set()))
+
+    def generate(self, prompt, temperature=0.7, use_cache=True, task="default", models=None, route=None,
+                 cancel=None, session_id=None, priority=PRIORITY_HEAVY, on_position=None):
+        """Returns the answer text (OUT_OF_LIMIT_MESSAGE when no pair could serve it).
+
+        models overrides the model preference order for this call; route is
+        the router's label for it, kept in the metrics. prompt is a string or a
+        CachedPrompt (sent as a suffix to a provider-side cached prefix).
+        Once the cancel event is set no new attempt (retry, fallback or hedge)
+        is started and CANCELLED_MESSAGE is returned.
+
+        With an admission controller, a cache miss first waits for a slot as
+        session_id with the given priority (on_position gets its queue position);
+        BUSY_MESSAGE is returned when the call is turned away.
+        """
+        text_prompt = prompt_text(prompt)
+        cache_text = prompt_cache_text(prompt)
+        lookup_started = time.monotonic()
+        cache_status, cached = self._cache_lookup(cache_text, temperature, use_cache, models)
+        if cached is not None:
+            self._record(model=None, key=None, outcome="ok", latency_s=time.monotonic() - lookup_started,
+                         cache="hit", task=task, route=route)
+            return cached
+
+        def complete(model, contents):
+            response = model.generate_content(contents)
+            return response, response.text
+
+        labels = {"cache": cache_status, "task": task, "stream": False, "route": route}
+        ticket, refusal = self._admit(session_id, priority, cancel, on_position, labels)
+        if refusal:
+            return refusal
+        winner = None
+        try:
+            winner = self._first_success(complete, prompt, temperature, labels, models, cancel)
+        finally:
+            self._release(ticket, winner, cancel)
+        if winner is None:
+            return CANCELLED_MESSAGE if self._cancelled(cancel, labels) else OUT_OF_LIMIT_MESSAGE
+
+        key, model_name, retry, started, (response, text) = winner
+        latency = time.monotonic() - started
+        self.scheduler.release(key, model_name, ok=True, latency=latency)
+        prompt_tokens, response_tokens = usage_tokens(response, text_prompt, text)
+        self._record(model=model_name, key=key, outcome="ok", latency_s=latency, retry=retry,
+                     prompt_tokens=prompt_tokens, response_tokens=response_tokens, **labels)
+        if cache_status == "miss":
+            self.cache.set(cache_text, temperature, model_name, text)
+        return text
+
+    def generate_stream(self, prompt, temperature=0.7, use_cache=True, task="default", models=None, route=None,
+                        cancel=None, session_id=None, priority=PRIORITY_HEAVY, on_position=None):
+        """Streaming variant of generate that yields text chunks.
+
+        Falls back to the next key/model (or hedges) only until the first chunk
+        has arrived; a failure after that is raised to the caller. A caller that
+        cancels mid-stream simply stops reading (the stream is recorded as abandoned).
+        The admission slot is held until the stream ends.
+        """
+        text_prompt = prompt_text(prompt)
+        cache_text = prompt_cache_text(prompt)
+        lookup_started = time.monotonic()
+        cache_status, cached = self._cache_lookup(cache_text, temperature, use_cache, models)
+        if cached is not None:
+            self._record(model=None, key=None, outcome="ok", latency_s=time.monotonic() - lookup_started,
+                         cache="hit", task=task, stream=True, route=route)
+            yield cached
+            return
+
+        def open_stream(model, contents):
+            # Pull until the first text chunk, so "started" means the model really answered
+            chunks = iter(model.generate_content(contents, stream=True))
+            for chunk in chunks:
+                text = chunk_text(chunk)
+                if text:
+                    return text, chunk, chunks, time.monotonic()
+            return "", None, chunks, None
+
+        labels = {"cache": cache_status, "task": task, "stream": True, "route": route}
+        ticket, refusal = self._admit(session_id, priority, cancel, on_position, labels)
+        if refusal:
+            yield refusal
+            return
+        winner = None
+        try:
+            winner = self._first_success(open_stream, prompt, temperature, labels, models, cancel)
+            if winner is None:
+                yield CANCELLED_MESSAGE if self._cancelled(cancel, labels) else OUT_OF_LIMIT_MESSAGE
+                return
+
+            key, model_name, retry, started, (first_text, last_chunk, chunks, first_chunk_at) = winner
+            parts = [first_text] if first_text else []
+            try:
+                if first_text:
+                    yield first_text
+                for chunk in chunks:
+                    last_chunk = chunk
+                    text = chunk_text(chunk)
+                    if text:
+                        parts.append(text)
+                        yield text
+
+            except GeneratorExit:
+                # Consumer stopped reading (e.g. the script run was interrupted)
+                latency = time.monotonic() - started
+                self.scheduler.release(key, model_name, ok=True, latency=latency)
+                self._record(model=model_name, key=key, outcome="abandoned", latency_s=latency, retry=retry, **labels)
+                raise
+
+            except Exception as e:
+                latency = time.monotonic() - started
+                rate_limited = isinstance(e, exceptions.ResourceExhausted)
+                self.scheduler.release(key, model_name, ok=False, latency=latency, rate_limited=rate_limited)
+                self._record(model=model_name, key=key, outcome="rate_limited" if rate_limited else "error",
+                             latency_s=latency, retry=retry, **labels)
+                raise
+
+            latency = time.monotonic() - started
+            full_text = "".join(parts)
+            self.scheduler.release(key, model_name, ok=True, latency=latency)
+            prompt_tokens, response_tokens = usage_tokens(last_chunk, text_prompt, full_text)
+            self._record(model=model_name, key=key, outcome="ok", latency_s=latency, retry=retry,
+                         ttft_s=(first_chunk_at - started) if first_chunk_at else None,
+                         prompt_tokens=prompt_tokens, response_tokens=response_tokens, **labels)
+            if cache_status == "miss" and parts:
+                self.cache.set(cache_text, temperature, model_name, full_text)
+        finally:
+            self._release(ticket, winner, cancel)
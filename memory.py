@@ -0,0 +1,61 @@
+"""Token-budgeted conversation memory for Standard Mode.
+
+Recent turns are kept verbatim. When they no longer fit the budget, the
+oldest ones are folded into a rolling summary in one LLM call, with enough
+headroom that the next few turns fit again without another summary call.
+"""
+from retrieval import estimate_tokens
+
+
+def format_message(msg):
+    return f"{msg['role']}: {msg['content']}"
+
+
+def new_memory_state():
+    return {"summary": "", "summarized_upto": 0}
+
+
+class ConversationMemory:
+    def __init__(self, token_budget=600, refill_ratio=0.5):
+        self.token_budget = token_budget
+        # After a fold only this share of the budget stays verbatim
+        self.refill_ratio = refill_ratio
+
+    def _window_start(self, messages, start, budget):
+        """Index of the oldest message (>= start) whose suffix still fits the budget."""
+        used = 0
+        index = len(messages)
+        while index > start:
+            cost = estimate_tokens(format_message(messages[index - 1]))
+            if used + cost > budget and index < len(messages):
+                break
+            used += cost
+            index -= 1
+        return index
+
+    def build(self, messages, state, summarize):
+        """Returns the history text for the next prompt and updates state in place.
+
+        summarize(previous_summary, transcript) must return the new summary,
+        or an "Error: ..." string when the call failed.
+        """
+        if state["summarized_upto"] > len(messages):
+            state.update(new_memory_state())
+
+        start = state["summarized_upto"]
+        window_start = self._window_start(messages, start, self.token_budget)
+        if window_start > start:
+            # Overflow: fold down to the refill mark, not just the single oldest turn
+            fold_to = self._window_start(messages, start, int(self.token_budget * self.refill_ratio))
+            transcript = "\n".join(format_message(m) for m in messages[start:fold_to])
+            summary = summarize(state["summary"], transcript)
+            if summary and not summary.startswith("Error:"):
+                state["summary"] = summary.strip()
+                state["summarized_upto"] = fold_to
+                window_start = fold_to
+            # On failure the prompt stays bounded by the verbatim window; retry next turn
+
+        lines = [format_message(m) for m in messages[window_start:]]
+        if state["summary"]:
+            lines.insert(0, f"SUMMARY OF EARLIER CONVERSATION: {state['summary']}")
+        return "\n".join(lines)
@@ -0,0 +1,247 @@
+"""Per-call instrumentation for LLM traffic.
+
+Every API attempt (and every cache hit) is written as one JSON line and
+folded into in-process aggregates: latency percentiles, error rates per
+model and key, and tokens per minute. The aggregates can be exported in
+Prometheus text format.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    def __init__(self, log_path=None, latency_window=1000, log_max_bytes=20 * 1024 * 1024):
+        self.log_path = log_path
+        self.log_max_bytes = log_max_bytes
+        self.latency_window = latency_window
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(lambda: deque(maxlen=latency_window))  # model -> seconds
+        self._ttft = defaultdict(lambda: deque(maxlen=latency_window))
+        self._attempts = Counter()  # (model, key, outcome) -> count
+        self._tokens = Counter()  # (model, "prompt"/"response") -> count
+        self._cache = Counter()  # "hit"/"miss"/"bypass" -> count
+        self._recent_tokens = deque()  # (timestamp, tokens) within the last minute
+        self._routes = defaultdict(Counter)  # route -> outcome / fallback / token counts
+        self._route_latencies = defaultdict(lambda: deque(maxlen=latency_window))
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+
+    def record(self, model, key, outcome, latency_s, prompt_tokens=0, response_tokens=0,
+               retry=0, cache="miss", task="default", ttft_s=None, stream=False, route=None):
+        now = time.time()
+        entry = {
+            "ts": round(now, 3),
+            "task": task,
+            "model": model,
+            "key": f"...{key[-4:]}" if key else None,
+            "outcome": outcome,
+            "latency_s": round(latency_s, 4),
+            "ttft_s": round(ttft_s, 4) if ttft_s is not None else None,
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": response_tokens,
+            "retry": retry,
+            "cache": cache,
+            "stream": stream,
+            "route": route,
+        }
+        with self._lock:
+            if retry == 0:
+                # One cache lookup per logical call, not per retry
+                self._cache[cache] += 1
+            if cache != "hit":
+                self._attempts[(model, entry["key"], outcome)] += 1
+                if outcome == "ok":
+                    self._latencies[model].append(latency_s)
+                    if ttft_s is not None:
+                        self._ttft[model].append(ttft_s)
+                self._tokens[(model, "prompt")] += prompt_tokens
+                self._tokens[(model, "response")] += response_tokens
+                self._recent_tokens.append((now, prompt_tokens + response_tokens))
+                if route is not None:
+                    self._record_route(route, outcome, latency_s, retry, response_tokens)
+            self._trim(now)
+            if self.log_path:
+                self._write(entry)
+        return entry
+
+    def _record_route(self, route, outcome, latency_s, retry, response_tokens):
+        counts = self._routes[route]
+        counts[outcome] += 1
+        if outcome == "ok":
+            self._route_latencies[route].append(latency_s)
+            counts["response_tokens"] += response_tokens
+            if retry:
+                # Served, but not by the first pair the route asked for
+                counts["fallbacks"] += 1
+
+    def _trim(self, now):
+        while self._recent_tokens and now - self._recent_tokens[0][0] > 60:
+            self._recent_tokens.popleft()
+
+    def _write(self, entry):
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self.log_max_bytes:
+                os.replace(self.log_path, f"{self.log_path}.1")
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Metrics log write failed: {e}")
+
+    def tokens_per_minute(self):
+        with self._lock:
+            self._trim(time.time())
+            return sum(tokens for _, tokens in self._recent_tokens)
+
+    def model_summary(self):
+        """One row per model: attempts, error rate and latency percentiles."""
+        with self._lock:
+            per_model = defaultdict(Counter)
+            for (model, _, outcome), count in self._attempts.items():
+                per_model[model][outcome] += count
+            rows = []
+            for model, outcomes in sorted(per_model.items(), key=lambda item: str(item[0])):
+                total = sum(outcomes.values())
+                latencies = list(self._latencies[model])
+                ttft = list(self._ttft[model])
+                rows.append({
+                    "model": model,
+                    "attempts": total,
+                    "error_rate": round((outcomes["error"] + outcomes["rate_limited"]) / total, 3) if total else 0.0,
+                    "rate_limited": outcomes["rate_limited"],
+                    "p50_s": percentile(latencies, 0.50),
+                    "p95_s": percentile(latencies, 0.95),
+                    "p99_s": percentile(latencies, 0.99),
+                    "ttft_p50_s": percentile(ttft, 0.50),
+                    "prompt_tokens": self._tokens[(model, "prompt")],
+                    "response_tokens": self._tokens[(model, "response")],
+                })
+            return rows
+
+    def key_summary(self):
+        with self._lock:
+            per_key = defaultdict(Counter)
+            for (model, key, outcome), count in self._attempts.items():
+                per_key[(model, key)][outcome] += count
+            return [
+                {
+                    "model": model,
+                    "key": key,
+                    "attempts": sum(outcomes.values()),
+                    "error_rate": round((outcomes["error"] + outcomes["rate_limited"]) / sum(outcomes.values()), 3),
+                }
+                for (model, key), outcomes in sorted(per_key.items(), key=lambda item: str(item[0]))
+            ]
+
+    def route_summary(self):
+        """One row per router decision: latency, errors and how often it had to fall back.
+
+        There is no user rating, so quality is approximated by the error and
+        fallback rates and the average answer length.
+        """
+        with self._lock:
+            rows = []
+            for route, counts in sorted(self._routes.items()):
+                ok = counts["ok"]
+                failed = counts["error"] + counts["rate_limited"]
+                latencies = list(self._route_latencies[route])
+                rows.append({
+                    "route": route,
+                    "answers": ok,
+                    "error_rate": round(failed / (ok + failed), 3) if ok + failed else 0.0,
+                    "fallback_rate": round(counts["fallbacks"] / ok, 3) if ok else 0.0,
+                    "p50_s": percentile(latencies, 0.50),
+                    "p95_s": percentile(latencies, 0.95),
+                    "avg_response_tokens": round(counts["response_tokens"] / ok) if ok else 0,
+                })
+            return rows
+
+    def latency_percentile(self, model, q, first_token=False, min_samples=1):
+        """Recent latency (or time-to-first-token) percentile, None with too few samples."""
+        with self._lock:
+            values = list((self._ttft if first_token else self._latencies)[model])
+        return percentile(values, q) if len(values) >= min_samples else None
+
+    def cache_summary(self):
+        with self._lock:
+            return dict(self._cache)
+
+    def to_prometheus(self):
+        lines = [
+            "# HELP llm_attempts_total LLM API attempts by model, key and outcome.",
+            "# TYPE llm_attempts_total counter",
+        ]
+        with self._lock:
+            for (model, key, outcome), count in sorted(self._attempts.items(), key=str):
+                lines.append(
+                    f'llm_attempts_total{{model="{_label(model)}",key="{_label(key)}",outcome="{_label(outcome)}"}} {count}'
+                )
+            lines += ["# HELP llm_tokens_total Tokens sent to and received from the model.",
+                      "# TYPE llm_tokens_total counter"]
+            for (model, direction), count in sorted(self._tokens.items(), key=str):
+                lines.append(f'llm_tokens_total{{model="{_label(model)}",direction="{direction}"}} {count}')
+            lines += ["# HELP llm_cache_lookups_total Response cache lookups by result.",
+                      "# TYPE llm_cache_lookups_total counter"]
+            for result, count in sorted(self._cache.items()):
+                lines.append(f'llm_cache_lookups_total{{result="{_label(result)}"}} {count}')
+            lines += ["# HELP llm_latency_seconds Latency of successful attempts (recent window).",
+                      "# TYPE llm_latency_seconds summary"]
+            for model, values in sorted(self._latencies.items(), key=lambda item: str(item[0])):
+                values = list(values)
+                if not values:
+                    continue
+                for q in (0.5, 0.95, 0.99):
+                    lines.append(f'llm_latency_seconds{{model="{_label(model)}",quantile="{q}"}} {percentile(values, q)}')
+                lines.append(f'llm_latency_seconds_sum{{model="{_label(model)}"}} {round(sum(values), 4)}')
+                lines.append(f'llm_latency_seconds_count{{model="{_label(model)}"}} {len(values)}')
+        lines += ["# HELP llm_tokens_per_minute Tokens processed in the last 60 seconds.",
+                  "# TYPE llm_tokens_per_minute gauge",
+                  f"llm_tokens_per_minute {self.tokens_per_minute()}"]
+        return "\n".join(lines) + "\n"
+
+
+class RerunStats:
+    """Wall time of Streamlit script runs, checked against a budget.
+
+    Model calls run in background tasks, so every script run only renders
+    and polls; all of them count against the budget.
+    """
+
+    def __init__(self, budget_s, window=200):
+        self.budget_s = budget_s
+        self._lock = threading.Lock()
+        self._runs = deque(maxlen=window)
+        self.over_budget = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._runs.append(seconds)
+            if seconds > self.budget_s:
+                self.over_budget += 1
+
+    def summary(self):
+        with self._lock:
+            runs = list(self._runs)
+            return {
+                "budget_ms": round(self.budget_s * 1000),
+                "runs": len(runs),
+                "last_ms": round(runs[-1] * 1000, 1) if runs else None,
+                "p50_ms": round(percentile(runs, 0.50) * 1000, 1) if runs else None,
+                "p95_ms": round(percentile(runs, 0.95) * 1000, 1) if runs else None,
+                "over_budget": self.over_budget,
+            }
@@ -0,0 +1,150 @@
+"""Warm-up store for the canned Council and Quick Insight buttons.
+
+Answers are generated in a background thread and saved to disk, so button
+clicks can be rendered without a live LLM round-trip. Each answer records the
+grounding of its question (a hash of the CV sections it was built from); after
+a CV change only answers whose grounding changed are treated as missing.
+"""
+import json
+import os
+import threading
+import time
+
+# Stores of consecutive CV versions share one file, so writes are merged under this lock
+_SAVE_LOCK = threading.Lock()
+
+
+def is_error_response(text):
+    return not text or text.startswith("Error:")
+
+
+class PrecomputedAnswers:
+    """version keys the canned prompts; grounding(question) -> hash of the CV context behind an answer."""
+
+    def __init__(self, version, path=None, grounding=None):
+        self.version = version
+        self.path = path
+        self.grounding = grounding
+        self.total = 0
+        self.failed = 0
+        self.finished = threading.Event()
+        self._answers = {}
+        self._groundings = {}  # question -> grounding under the CV version of this store
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == version:
+                    self._answers = data.get("answers", {})
+            except (OSError, ValueError) as e:
+                print(f"Could not load precomputed answers: {e}")
+
+    @staticmethod
+    def _key(kind, label, tone):
+        return f"{kind}|{label}|{tone}"
+
+    def _grounding_of(self, question):
+        if self.grounding is None:
+            return None
+        with self._lock:
+            if question in self._groundings:
+                return self._groundings[question]
+        value = self.grounding(question)
+        with self._lock:
+            self._groundings[question] = value
+        return value
+
+    def _is_current(self, entry):
+        return entry.get("grounding") == self._grounding_of(entry["query"])
+
+    def get(self, kind, label, tone):
+        """The stored entry, or None if there is none or the CV behind it has changed."""
+        with self._lock:
+            entry = self._answers.get(self._key(kind, label, tone))
+        return entry if entry is not None and self._is_current(entry) else None
+
+    def put(self, kind, label, tone, entry):
+        entry = dict(entry, grounding=self._grounding_of(entry["query"]), saved_at=time.time())
+        with self._lock:
+            self._answers[self._key(kind, label, tone)] = entry
+        self.save()
+
+    def save(self):
+        """Writes the answers, keeping whichever copy of an entry is newer than the one on disk.
+
+        A warm-up for the previous CV version may still be writing to the same file.
+        """
+        if not self.path:
+            return
+        with _SAVE_LOCK:
+            answers = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                if saved.get("version") == self.version:
+                    answers = saved.get("answers", {})
+            except (OSError, ValueError):
+                pass
+            with self._lock:
+                for key, entry in self._answers.items():
+                    if entry.get("saved_at", 0) >= answers.get(key, {}).get("saved_at", 0):
+                        answers[key] = entry
+                payload = {"version": self.version, "answers": answers}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def status(self):
+        with self._lock:
+            entries = list(self._answers.values())
+        ready = sum(1 for entry in entries if self._is_current(entry))
+        return {
+            "version": self.version,
+            "ready": ready,
+            "stale": len(entries) - ready,
+            "total": self.total,
+            "failed": self.failed,
+            "finished": self.finished.is_set(),
+        }
+
+
+def warm_up(store, council_presets, quick_insights, tones, run_draft, run_audit, run_insight):
+    """Fills the store for every canned prompt and tone that is still missing (or stale).
+
+    The Visionary drafts do not depend on the tone, so each council preset
+    costs one round of drafts plus one Auditor call per tone.
+    """
+    store.total = len(council_presets) * len(tones) + len(quick_insights) * len(tones)
+    try:
+        for label, question in council_presets.items():
+            missing = [tone for tone in tones if store.get("council", label, tone) is None]
+            if not missing:
+                continue
+            drafts = run_draft(question)
+            if all(is_error_response(d["text"]) for d in drafts):
+                store.failed += len(missing)
+                continue
+            for tone in missing:
+                final = run_audit(question, drafts, tone)
+                if is_error_response(final):
+                    store.failed += 1
+                    continue
+                store.put("council", label, tone, {"query": question, "drafts": drafts, "final": final})
+
+        for label, question in quick_insights.items():
+            for tone in tones:
+                if store.get("insight", label, tone) is not None:
+                    continue
+                answer = run_insight(question, tone)
+                if is_error_response(answer):
+                    store.failed += 1
+                    continue
+                store.put("insight", label, tone, {"query": question, "answer": answer})
+    except Exception as e:
+        print(f"Warm-up stopped: {e}")
+    finally:
+        store.finished.set()
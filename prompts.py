@@ -0,0 +1,136 @@
+"""Prompt templates shared by the live UI and the background warm-up."""
+
+TONE_OPTIONS = ("Professional & Formal", "Enthusiastic & Eager", "Assertive & Confident", "Technical & Precise")
+
+# Prompts built with context=None rely on the knowledge prefix (see build_knowledge_prefix),
+# which the provider keeps cached, instead of carrying the CV themselves
+CACHED_CONTEXT = "(the CV knowledge base given before this request)"
+
+
+def build_knowledge_prefix(name, cv_text):
+    """(system_instruction, text) of the stable prefix shared by every CV-grounded prompt."""
+    system_instruction = (
+        f"You work for {name}'s AI portfolio assistant. The CV below is the knowledge base and the only "
+        f"ground truth about {name}. Follow the role and task given in each request."
+    )
+    return system_instruction, f"KNOWLEDGE BASE (CV):\n{cv_text}"
+
+
+# Canned questions behind the buttons in tab 1 (Council) and tab 2 (Quick Insights)
+COUNCIL_PRESETS = {
+    "T-Shaped Student": (
+        "Analyze Kaan's technical spectrum based on the entire CV data. "
+        "How does combining 'Low-Level Control' (Assembly, C, Real-time) with 'High-Level Data Science' (R, SQL, AI) "
+        "make him a uniquely qualified System Architect? Prove that he is not just a coder, but a 'T-Shaped' student."
+    ),
+    "First-Principles AI Logic": (
+        "Does Kaan possess a true 'First-Principles' understanding of AI beyond just using libraries? "
+        "Synthesize his knowledge of Neural Network math (Backprop), Unsupervised Learning metrics (Elbow Method), "
+        "and Strategic Logic (Reinforcement Learning concepts)."
+    ),
+    "High-Impact Intern Potential": (
+        "Synthesize Kaan's academic rigor (Grades) and his 'End-to-End Ownership' in projects (IoT, SUMO). "
+        "Why is he a 'High-ROI' candidate for a Summer 2026 internship? "
+        "Who is eager to improve himself especially in complex architectural tasks?"
+    ),
+}
+
+QUICK_INSIGHTS = {
+    "Academic Highlights": "Extract Kaan's current GPA and list his key course grades in descending order from the CV data. ",
+    "Java OOP Architectur": "Don't just list the features. Analyze the architectural complexity of the SUMO Traffic Wrapper.How did Kaan apply strict Object-Oriented Design (OOP) and concurrency to manage the simulation?",
+    "Tech Stack List": "List all programming languages and tools Kaan is proficient in, categorized by domain (Backend, Embedded, AI).",
+}
+
+
+def build_standard_prompt(name, context, tone, history_text, question):
+    return f"""
+        You are an AI assistant representing {name}.
+        KNOWLEDGE BASE: {context or CACHED_CONTEXT}
+        TONE: {tone}
+        HISTORY: {history_text}
+        QUESTION: {question}
+
+        INSTRUCTIONS:
+        Answer based ONLY on the CV data. Be impressive but grounded in facts.
+        Focus on Engineering Architecture and AI Logic.
+    """
+
+
+def build_summary_prompt(previous_summary, transcript):
+    return f"""
+        Role: Conversation Summarizer.
+        PREVIOUS SUMMARY: {previous_summary or "(none)"}
+        NEW TURNS:
+        {transcript}
+
+        TASK: Update the summary with the new turns in at most 120 words.
+        Keep the questions asked and the facts already given. Output ONLY the summary.
+    """
+
+
+def build_draft_prompt(context, question):
+    return f"""
+            Role: Enthusiastic Job Candidate.
+            CV KNOWLEDGE: {context or CACHED_CONTEXT}
+            USER QUESTION: {question}
+            INSTRUCTION: Be bold, highlight potential. It is okay to be slightly creative connecting dots.
+            """
+
+
+def build_audit_prompt(context, drafts, tone):
+    if isinstance(drafts, str):
+        drafts = [drafts]
+    draft_block = "\n\n".join(f"DRAFT {i}: {draft}" for i, draft in enumerate(drafts, start=1))
+    return f"""
+            Role: Strict Fact-Checker & CV Auditor.
+            GROUND TRUTH (CV): {context or CACHED_CONTEXT}
+            INDEPENDENT DRAFT ANSWERS:
+            {draft_block}
+
+            YOUR TASK:
+            1. You are the 'Ensemble' filter. Reconcile the drafts: keep what they agree on and what the CV supports, drop the rest.
+            2. Correct any hallucinations in the drafts.
+            3. Ensure the answer strictly matches the CV skills (especially the ML/AI section).
+            4. Convert the tone to: {tone}.
+            5. Output ONLY the final polished answer.
+            """
+
+
+def build_cover_letter_prompt(context, job_desc, company_name, language=None):
+    # "Detect Automatically" leaves the language to the model (it follows the job description)
+    language_line = f"\n                LANGUAGE: Write the letter in {language}." if language and language != "Detect Automatically" else ""
+    return f"""
+                Act as Kaan Değirmenci.
+                MY CV DATA: {context or CACHED_CONTEXT}
+                TARGET JOB DESCRIPTION: '{job_desc}'
+                TASK: Write a cover letter for {company_name}.{language_line}
+                """
+
+
+def build_correction_prompt(context, draft, flagged, tone):
+    flagged_block = "\n".join(f"- {claim}" for claim in flagged)
+    return f"""
+            Role: Strict Fact-Checker & CV Auditor.
+            GROUND TRUTH (CV): {context or CACHED_CONTEXT}
+            DRAFT ANSWER: {draft}
+            CLAIMS THAT CONTRADICT THE CV:
+            {flagged_block}
+
+            YOUR TASK:
+            1. Fix or remove ONLY the claims listed above, using the CV values given in brackets.
+            2. Keep the rest of the draft as it is.
+            3. Convert the tone to: {tone}.
+            4. Output ONLY the final polished answer.
+            """
+
+
+def build_tone_prompt(draft, tone):
+    return f"""
+            Role: Editor.
+            ANSWER: {draft}
+
+            YOUR TASK:
+            1. Convert the tone to: {tone}.
+            2. Keep every fact, number and name exactly as it is; add nothing.
+            3. Output ONLY the rewritten answer.
+            """
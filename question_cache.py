@@ -0,0 +1,155 @@
+"""Near-duplicate question cache shared by every session.
+
+Questions are normalized (case, punctuation, contractions, filler words)
+and compared as TF-IDF vectors over character trigrams, so "what's his GPA"
+and "Kaan GPA?" land on the same stored answer. Entries are partitioned by
+mode and tone, and each remembers the grounding of its question (a hash of the
+CV sections it was answered from): after a CV change, an entry is dropped when
+it is next matched and its grounding no longer holds; the rest stay valid.
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+CONTRACTIONS = {"what's": "what is", "who's": "who is", "where's": "where is", "he's": "he is",
+                "isn't": "is not", "doesn't": "does not", "didn't": "did not", "can't": "can not"}
+# Dropped before matching: they do not change what is being asked. Question words other
+# than "what" are kept ("where did he study" is not "when did he study").
+FILLER_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "of", "in", "on", "at", "to",
+    "for", "and", "or", "what", "whats", "his", "he", "him", "her", "she", "their", "your", "you", "me",
+    "my", "i", "can", "could", "would", "please", "tell", "about", "give", "show", "us", "has", "have",
+}
+# Follow-ups only make sense with the conversation so far, so they are never shared
+FOLLOW_UP_CUES = {"more", "this", "it", "those", "these", "elaborate", "continue", "again", "else",
+                  "previous", "above", "earlier"}
+
+
+def normalize_question(question, extra_stopwords=()):
+    text = question.lower().replace("\u2019", "'")
+    for short, full in CONTRACTIONS.items():
+        text = text.replace(short, full)
+    text = re.sub(r"'s\b", "", text)  # possessive: "kaan's gpa" -> "kaan gpa"
+    words = re.findall(r"[a-z0-9+#]+", text)
+    stopwords = FILLER_WORDS | set(extra_stopwords)
+    return " ".join(w for w in words if w not in stopwords)
+
+
+def is_context_dependent(question):
+    words = set(re.findall(r"[a-z]+", question.lower()))
+    return bool(words & FOLLOW_UP_CUES)
+
+
+def char_ngrams(text, n=3):
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+
+
+class SimilarQuestionCache:
+    """TF-IDF / cosine index of answered questions with an LRU cap.
+
+    answers are opaque (a string for Standard Mode, a dict for Council Mode).
+    grounding(question) returns the current grounding hash of a question.
+    """
+
+    def __init__(self, threshold=0.85, max_entries=2000, extra_stopwords=(), ngram=3):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.extra_stopwords = {w.lower() for w in extra_stopwords}
+        self.ngram = ngram
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # entry_id -> entry dict
+        self._postings = defaultdict(set)  # ngram -> entry ids
+        self._df = Counter()  # ngram -> number of entries containing it
+        self._next_id = 0
+        self.counters = Counter()
+
+    def _idf(self, gram):
+        return math.log((len(self._entries) + 1) / (self._df[gram] + 1)) + 1.0
+
+    def _vector(self, grams):
+        weights = {gram: count * self._idf(gram) for gram, count in grams.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {gram: w / norm for gram, w in weights.items()}
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        for gram in entry["grams"]:
+            self._postings[gram].discard(entry_id)
+            self._df[gram] -= 1
+            if self._df[gram] <= 0:
+                del self._df[gram]
+                del self._postings[gram]
+
+    def lookup(self, question, mode, tone, grounding):
+        """Returns (answer, matched_question, similarity) or None."""
+        normalized = normalize_question(question, self.extra_stopwords)
+        if not normalized or is_context_dependent(question):
+            with self._lock:
+                self.counters["skipped"] += 1
+            return None
+
+        grams = char_ngrams(normalized, self.ngram)
+        with self._lock:
+            candidates = set()
+            for gram in grams:
+                candidates |= self._postings.get(gram, set())
+            query = self._vector(grams)
+            best, best_score = None, 0.0
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if entry["mode"] != mode or entry["tone"] != tone:
+                    continue
+                vector = self._vector(entry["grams"])
+                score = sum(weight * vector.get(gram, 0.0) for gram, weight in query.items())
+                if score > best_score:
+                    best, best_score = entry_id, score
+
+            if best is None or best_score < self.threshold:
+                self.counters["misses"] += 1
+                return None
+            entry = self._entries[best]
+
+        # Checked outside the lock: grounding runs a retrieval over the CV
+        if entry["grounding"] != grounding(entry["question"]):
+            with self._lock:
+                if best in self._entries:
+                    self._remove(best)
+                self.counters["invalidations"] += 1
+                self.counters["misses"] += 1
+            return None
+        with self._lock:
+            if best in self._entries:
+                self._entries.move_to_end(best)
+            self.counters["hits"] += 1
+        return entry["answer"], entry["question"], round(best_score, 3)
+
+    def store(self, question, mode, tone, grounding, answer):
+        normalized = normalize_question(question, self.extra_stopwords)
+        if not normalized or is_context_dependent(question):
+            return
+        grams = char_ngrams(normalized, self.ngram)
+        grounded_on = grounding(question)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "question": question, "mode": mode, "tone": tone, "grams": grams,
+                "answer": answer, "grounding": grounded_on, "created_at": time.time(),
+            }
+            for gram in grams:
+                self._postings[gram].add(entry_id)
+                self._df[gram] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self.counters["stores"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        stats["hit_rate"] = round(stats.get("hits", 0) / lookups, 3) if lookups else 0.0
+        return stats
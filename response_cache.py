@@ -0,0 +1,136 @@
+"""Two-tier cache for LLM responses: in-process LRU in front of a shared SQLite file.
+
+The SQLite tier lives on local disk so every Streamlit worker process on the
+same host can reuse answers generated by the others.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_prompt(prompt):
+    # Prompts are built from indented f-strings, so whitespace is noise
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def make_cache_key(prompt, temperature, model):
+    raw = f"{model}|{round(float(temperature), 2)}|{normalize_prompt(prompt)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, db_path, max_memory_entries=256, max_disk_entries=5000, ttl_seconds=24 * 3600):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()  # key -> (created_at, response)
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "stores": 0}
+
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+            self._conn.commit()
+
+    def _is_fresh(self, created_at, now):
+        return self.ttl_seconds is None or now - created_at < self.ttl_seconds
+
+    def _remember(self, key, created_at, response):
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, prompt, temperature, model):
+        key = make_cache_key(prompt, temperature, model)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._is_fresh(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and self._is_fresh(row[1], now):
+                        self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        self._conn.commit()
+                        self._remember(key, row[1], row[0])
+                        self.counters["disk_hits"] += 1
+                        return row[0]
+                except sqlite3.Error as e:
+                    print(f"Cache read failed: {e}")
+
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, prompt, temperature, model, response):
+        key = make_cache_key(prompt, temperature, model)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+            self.counters["stores"] += 1
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, response, now, now),
+                )
+                self._writes_since_evict += 1
+                # Eviction scans the table, so only run it every few writes
+                if self._writes_since_evict >= 50:
+                    self._evict(now)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Cache write failed: {e}")
+
+    def _evict(self, now):
+        self._writes_since_evict = 0
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def record_bypass(self):
+        with self._lock:
+            self.counters["bypassed"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
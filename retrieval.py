@@ -0,0 +1,130 @@
+"""Section-level BM25 retrieval over the CV knowledge base.
+
+The CV dict is split into small, self-describing chunks (one per project,
+one per skill list, coursework grades, ...) so a prompt only has to carry
+the sections that are relevant for the current question.
+"""
+import json
+import math
+import re
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        # Very light stemming so "grades"/"grade" and "projects"/"project" meet
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def estimate_tokens(text):
+    # Rough heuristic used by the Gemini docs: ~4 characters per token
+    return max(1, len(text) // 4)
+
+
+def chunk_cv(cv_data):
+    """Splits cv_data into a list of (section_id, value) pairs."""
+    chunks = []
+
+    def walk(node, path):
+        if isinstance(node, dict):
+            scalars = {k: v for k, v in node.items() if not isinstance(v, (dict, list))}
+            if scalars and path:
+                chunks.append((path, scalars))
+            for key, value in node.items():
+                if isinstance(value, (dict, list)):
+                    walk(value, f"{path}.{key}" if path else key)
+                elif not path:
+                    chunks.append((key, value))
+        elif isinstance(node, list) and any(isinstance(item, dict) for item in node):
+            for i, item in enumerate(node):
+                walk(item, f"{path}[{i}]")
+        else:
+            chunks.append((path, node))
+
+    walk(cv_data, "")
+    return chunks
+
+
+def render_chunk(section_id, value):
+    return f"[{section_id}]\n{json.dumps(value, indent=2, ensure_ascii=False)}"
+
+
+class CVIndex:
+    """BM25 index over chunk_cv() sections. Build once, query many times."""
+
+    def __init__(self, cv_data, always_include=("personal_info",), k1=1.5, b=0.75):
+        self.full_text = json.dumps(cv_data, indent=2)
+        self.always_include = tuple(always_include)
+        self.k1 = k1
+        self.b = b
+
+        self.chunks = []
+        for section_id, value in chunk_cv(cv_data):
+            text = render_chunk(section_id, value)
+            self.chunks.append({
+                "id": section_id,
+                "text": text,
+                "tokens": estimate_tokens(text),
+                "terms": Counter(tokenize(text)),
+            })
+
+        self.avg_len = sum(sum(c["terms"].values()) for c in self.chunks) / max(1, len(self.chunks))
+        doc_freq = Counter()
+        for chunk in self.chunks:
+            doc_freq.update(chunk["terms"].keys())
+        n = len(self.chunks)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def score(self, query_terms, chunk):
+        terms = chunk["terms"]
+        length = sum(terms.values())
+        total = 0.0
+        for term in query_terms:
+            tf = terms.get(term, 0)
+            if not tf:
+                continue
+            norm = tf + self.k1 * (1 - self.b + self.b * length / self.avg_len)
+            total += self.idf[term] * tf * (self.k1 + 1) / norm
+        return total
+
+    def search(self, query, top_k=5):
+        """Returns up to top_k (score, chunk) pairs with a positive score, best first."""
+        query_terms = set(tokenize(query))
+        scored = [(self.score(query_terms, chunk), chunk) for chunk in self.chunks]
+        scored = [pair for pair in scored if pair[0] > 0]
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return scored[:top_k]
+
+    def build_context(self, query, top_k=5, token_budget=800):
+        """Returns the CV context for a query.
+
+        Falls back to the full CV when nothing matches or the token budget
+        is large enough to hold everything anyway.
+        """
+        if token_budget is None or estimate_tokens(self.full_text) <= token_budget:
+            return self.full_text
+
+        hits = self.search(query, top_k)
+        if not hits:
+            return self.full_text
+
+        selected = [c for c in self.chunks if c["id"].split(".")[0].split("[")[0] in self.always_include]
+        used = sum(c["tokens"] for c in selected)
+        for _, chunk in hits:
+            if chunk in selected:
+                continue
+            if used + chunk["tokens"] > token_budget and len(selected) > len(self.always_include):
+                continue
+            selected.append(chunk)
+            used += chunk["tokens"]
+
+        # Keep the original CV order so the prompt reads like the source document
+        order = {id(c): i for i, c in enumerate(self.chunks)}
+        selected.sort(key=lambda c: order[id(c)])
+        return "\n\n".join(c["text"] for c in selected)
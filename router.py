@@ -0,0 +1,88 @@
+"""Local query-complexity router.
+
+Picks the model tier for each call from cheap features of the request: the
+task (standard answer, Visionary draft, Auditor, cover letter, summary), the
+length of the question and the prompt, and whether the question asks to look
+something up or to reason about it. Simple extraction goes to the fast model
+first and synthesis to the strong one. Every route returns the whole pool,
+reordered, so fail-over to the other tier still works.
+"""
+import re
+
+from retrieval import estimate_tokens, tokenize
+
+ROUTE_AUTO = "Auto"
+ROUTE_FAST = "Always fast model"
+ROUTE_STRONG = "Always strong model"
+ROUTING_OPTIONS = [ROUTE_AUTO, ROUTE_FAST, ROUTE_STRONG]
+
+# Tasks whose output quality depends on reasoning over several inputs
+SYNTHESIS_TASKS = {"auditor", "cover_letter"}
+# Tasks that only compress or restate text
+EXTRACTION_TASKS = {"summary", "tone"}
+
+EXTRACTION_CUES = (
+    "list", "which", "what", "when", "where", "who", "name", "how many", "how long",
+    "show", "give", "languages", "skills", "contact", "email", "gpa", "education",
+)
+SYNTHESIS_CUES = (
+    "why", "how would", "how does", "how do", "compare", "explain", "evaluate", "assess",
+    "analy", "design", "fit", "suitable", "strength", "weakness", "convince", "recommend",
+    "should", "tradeoff", "trade-off", "improve", "vision", "architect",
+)
+
+
+def question_features(question, prompt=""):
+    text = (question or "").lower()
+    words = tokenize(text)
+    return {
+        "words": len(words),
+        "prompt_tokens": estimate_tokens(prompt),
+        "parts": max(1, text.count("?") + len(re.findall(r"\b(?:and also|as well as|then)\b", text))),
+        "extraction_cues": sum(1 for cue in EXTRACTION_CUES if re.search(rf"\b{re.escape(cue)}", text)),
+        "synthesis_cues": sum(1 for cue in SYNTHESIS_CUES if re.search(rf"\b{re.escape(cue)}", text)),
+    }
+
+
+class QueryRouter:
+    """Maps (task, question, prompt) to a route name and a model preference order.
+
+    fast_model / strong_model must both be in models; any other models keep
+    their pool position after the preferred one.
+    """
+
+    def __init__(self, models, fast_model, strong_model, max_simple_words=14, max_simple_prompt_tokens=2500):
+        self.models = list(models)
+        self.fast_model = fast_model
+        self.strong_model = strong_model
+        self.max_simple_words = max_simple_words
+        self.max_simple_prompt_tokens = max_simple_prompt_tokens
+
+    def classify(self, task, question=None, prompt=""):
+        """Returns "fast" or "strong" for one request."""
+        if task in SYNTHESIS_TASKS:
+            return "strong"
+        if task in EXTRACTION_TASKS:
+            return "fast"
+
+        features = question_features(question, prompt)
+        if features["prompt_tokens"] > self.max_simple_prompt_tokens or features["parts"] > 1:
+            return "strong"
+        if features["synthesis_cues"]:
+            return "strong"
+        if features["extraction_cues"] and features["words"] <= self.max_simple_words:
+            return "fast"
+        return "strong"
+
+    def route(self, task, question=None, prompt="", override=ROUTE_AUTO):
+        """Returns (route_name, models in preference order)."""
+        if override == ROUTE_FAST:
+            tier = "fast"
+        elif override == ROUTE_STRONG:
+            tier = "strong"
+        else:
+            tier = self.classify(task, question, prompt)
+        preferred = self.fast_model if tier == "fast" else self.strong_model
+        models = [preferred] + [m for m in self.models if m != preferred]
+        name = f"{task}:{tier}" + ("" if override == ROUTE_AUTO else " (override)")
+        return name, models
@@ -0,0 +1,178 @@
+"""Health-aware scheduler for (API key, model) pairs.
+
+Every pair has its own token bucket (requests per minute), a cool-down
+window after a 429, a circuit breaker after repeated failures and an
+EWMA of observed latency. acquire() hands out the healthiest pair for the
+most preferred model that has one available.
+"""
+import threading
+import time
+
+
+class PairState:
+    def __init__(self, key, model, rpm, burst):
+        self.key = key
+        self.model = model
+        self.rate = rpm / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.cooldown_until = 0.0
+        self.circuit_open_until = 0.0
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.ewma_latency = None
+        self.last_used = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.rate_limited = 0
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def is_blocked(self, now):
+        return now < self.cooldown_until or now < self.circuit_open_until
+
+    def seconds_until_token(self):
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class KeyScheduler:
+    def __init__(self, api_keys, models, rpm=10, burst=3, cooldown_seconds=60,
+                 failure_threshold=3, circuit_seconds=120, max_wait=10.0, latency_alpha=0.3):
+        self.models = list(models)
+        self.cooldown_seconds = cooldown_seconds
+        self.failure_threshold = failure_threshold
+        self.circuit_seconds = circuit_seconds
+        self.max_wait = max_wait
+        self.latency_alpha = latency_alpha
+        self._pairs = {
+            (key, model): PairState(key, model, rpm, burst)
+            for model in self.models
+            for key in api_keys
+        }
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def _pick(self, models, exclude, now):
+        """Returns (pair, wait_seconds) for the best candidate, or (None, None)."""
+        fallback = None
+        for model in models:
+            candidates = []
+            for (key, pair_model), state in self._pairs.items():
+                if pair_model != model or (key, model) in exclude:
+                    continue
+                state.refill(now)
+                if state.is_blocked(now):
+                    continue
+                candidates.append(state)
+            if not candidates:
+                continue
+
+            ready = [s for s in candidates if s.tokens >= 1]
+            if ready:
+                # Least-loaded first, then fastest, then least recently used (round-robin)
+                best = min(ready, key=lambda s: (s.in_flight, s.ewma_latency or 0.0, s.last_used))
+                return best, 0.0
+
+            soonest = min(candidates, key=lambda s: s.seconds_until_token())
+            if fallback is None or soonest.seconds_until_token() < fallback[1]:
+                fallback = (soonest, soonest.seconds_until_token())
+        return fallback if fallback else (None, None)
+
+    def acquire(self, models=None, exclude=(), max_wait=None, cancel=None):
+        """Reserves the healthiest (key, model) pair, waiting briefly for a token if needed.
+
+        Returns None when every candidate pair is cooling down, circuit-broken
+        or would need longer than max_wait (default: self.max_wait) for its next token,
+        or once the cancel event (if given) is set.
+        """
+        models = list(models) if models else self.models
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        while True:
+            if cancel is not None and cancel.is_set():
+                return None
+            with self._lock:
+                now = time.monotonic()
+                state, wait = self._pick(models, set(exclude), now)
+                if state is None or (wait > 0 and now + wait > deadline):
+                    return None
+                if wait == 0.0:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    state.last_used = now
+                    return state.key, state.model
+            if cancel is not None:
+                cancel.wait(min(wait, 1.0))
+            else:
+                time.sleep(min(wait, 1.0))
+
+    def release(self, key, model, ok, latency=None, rate_limited=False):
+        with self._lock:
+            state = self._pairs.get((key, model))
+            if state is None:
+                return
+            now = time.monotonic()
+            state.in_flight = max(0, state.in_flight - 1)
+            if latency is not None:
+                if state.ewma_latency is None:
+                    state.ewma_latency = latency
+                else:
+                    state.ewma_latency += self.latency_alpha * (latency - state.ewma_latency)
+
+            if ok:
+                state.successes += 1
+                state.consecutive_failures = 0
+                state.circuit_open_until = 0.0
+                return
+
+            state.failures += 1
+            state.consecutive_failures += 1
+            if rate_limited:
+                state.rate_limited += 1
+                state.cooldown_until = now + self.cooldown_seconds
+                state.tokens = 0.0
+            if state.consecutive_failures >= self.failure_threshold:
+                # Half-open after the window: the next acquire is a single trial call
+                state.circuit_open_until = now + self.circuit_seconds
+
+    def unused(self, key, model):
+        """Returns a slot taken by acquire() whose request was never sent (its caller gave up first)."""
+        with self._lock:
+            state = self._pairs.get((key, model))
+            if state is None:
+                return
+            state.in_flight = max(0, state.in_flight - 1)
+            state.tokens = min(state.capacity, state.tokens + 1)
+
+    def snapshot(self):
+        """Current per-pair state for the Architect View (key shown by suffix only)."""
+        with self._lock:
+            now = time.monotonic()
+            rows = []
+            for state in self._pairs.values():
+                state.refill(now)
+                if now < state.circuit_open_until:
+                    health = "circuit open"
+                elif now < state.cooldown_until:
+                    health = "cooling down"
+                else:
+                    health = "healthy"
+                rows.append({
+                    "model": state.model,
+                    "key": f"...{state.key[-4:]}",
+                    "health": health,
+                    "tokens": round(state.tokens, 2),
+                    "in_flight": state.in_flight,
+                    "ewma_latency_s": round(state.ewma_latency, 2) if state.ewma_latency is not None else None,
+                    "ok": state.successes,
+                    "failed": state.failures,
+                    "429s": state.rate_limited,
+                    "blocked_for_s": round(max(0.0, state.cooldown_until - now, state.circuit_open_until - now), 1),
+                })
+            return rows
@@ -0,0 +1,181 @@
+"""Memory budgets for per-session chat state, with spill-to-disk.
+
+Every script run reports its session's chat streams (lists of messages).
+When a session is over its budget, its oldest messages are moved to a local
+SQLite file (WAL) and can be read back page by page when the user scrolls up.
+The per-session budget shrinks when the sum over all sessions exceeds the
+global budget, and sessions that stay idle too long are spilled entirely and
+forgotten.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Rough per-message overhead of the dict and its strings in CPython
+MESSAGE_OVERHEAD_BYTES = 200
+
+
+def approx_bytes(item):
+    if isinstance(item, dict) and "content" in item and "role" in item:
+        return len(item["content"].encode("utf-8")) + MESSAGE_OVERHEAD_BYTES
+    return len(json.dumps(item, default=str).encode("utf-8")) + MESSAGE_OVERHEAD_BYTES
+
+
+class SessionStore:
+    def __init__(self, db_path, session_budget_bytes=256 * 1024, global_budget_bytes=64 * 1024 * 1024,
+                 idle_seconds=1800, min_keep=6):
+        self.session_budget_bytes = session_budget_bytes
+        self.global_budget_bytes = global_budget_bytes
+        self.idle_seconds = idle_seconds
+        self.min_keep = min_keep
+        self._lock = threading.Lock()
+        # session_id -> {"last_seen", "streams", "limits", "on_spill", "bytes", "spilled"}
+        self._sessions = {}
+        self.evicted_sessions = 0
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spilled ("
+            "session_id TEXT NOT NULL, stream TEXT NOT NULL, seq INTEGER NOT NULL, "
+            "payload TEXT NOT NULL, spilled_at REAL NOT NULL, PRIMARY KEY (session_id, stream, seq))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_spilled_time ON spilled(spilled_at)")
+        self._conn.commit()
+
+    # --- Budgets ---
+
+    def _budget(self):
+        """Per-session budget, reduced to a fair share while the global budget is exceeded."""
+        total = sum(sum(entry["bytes"].values()) for entry in self._sessions.values())
+        if total <= self.global_budget_bytes:
+            return self.session_budget_bytes
+        return min(self.session_budget_bytes, self.global_budget_bytes // max(1, len(self._sessions)))
+
+    def enforce(self, session_id, streams, limits=None, on_spill=None):
+        """Spills the oldest items of this session's streams until it fits its budget.
+
+        streams: {name: list}, mutated in place (oldest items are removed from the front).
+        limits: {name: n} caps how many leading items of a stream may be spilled.
+        on_spill(name, count) is called after items were removed from a stream.
+        Returns {name: items spilled in this call}.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, {"spilled": {}})
+            entry.update(last_seen=now, streams=streams, limits=limits or {}, on_spill=on_spill)
+            entry["bytes"] = {name: sum(approx_bytes(item) for item in items) for name, items in streams.items()}
+
+            spilled = {}
+            budget = self._budget()
+            while sum(entry["bytes"].values()) > budget:
+                name = self._largest_spillable(entry)
+                if name is None:
+                    break
+                spilled[name] = spilled.get(name, 0) + self._spill(session_id, entry, name, 1)
+
+            self._evict_idle(now, exclude=session_id)
+
+        for name, count in spilled.items():
+            if on_spill:
+                on_spill(name, count)
+        return spilled
+
+    def _spillable(self, entry, name):
+        items = entry["streams"][name]
+        limit = entry["limits"].get(name, len(items))
+        return max(0, min(limit, len(items) - self.min_keep))
+
+    def _largest_spillable(self, entry):
+        candidates = [name for name in entry["streams"] if self._spillable(entry, name) > 0]
+        return max(candidates, key=lambda name: entry["bytes"][name]) if candidates else None
+
+    def _spill(self, session_id, entry, name, count):
+        items = entry["streams"][name]
+        moved = items[:count]
+        first_seq = self._next_seq(session_id, entry, name)
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO spilled (session_id, stream, seq, payload, spilled_at) VALUES (?, ?, ?, ?, ?)",
+                [(session_id, name, first_seq + i, json.dumps(item, default=str), time.time())
+                 for i, item in enumerate(moved)],
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Session spill failed: {e}")
+            entry["limits"][name] = 0  # keep the data in memory rather than lose it
+            return 0
+        del items[:count]
+        entry["spilled"][name] = first_seq + len(moved)
+        entry["bytes"][name] -= sum(approx_bytes(item) for item in moved)
+        if name in entry["limits"]:
+            entry["limits"][name] -= len(moved)
+        return len(moved)
+
+    def _next_seq(self, session_id, entry, name):
+        if name not in entry["spilled"]:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM spilled WHERE session_id = ? AND stream = ?",
+                (session_id, name),
+            ).fetchone()
+            entry["spilled"][name] = row[0]
+        return entry["spilled"][name]
+
+    def _evict_idle(self, now, exclude):
+        """Spills every spillable item of idle sessions and drops the references to their state."""
+        for session_id, entry in list(self._sessions.items()):
+            if session_id == exclude or now - entry["last_seen"] < self.idle_seconds:
+                continue
+            for name in entry["streams"]:
+                count = self._spillable(entry, name)
+                if count and self._spill(session_id, entry, name, count) and entry["on_spill"]:
+                    entry["on_spill"](name, count)
+            del self._sessions[session_id]
+            self.evicted_sessions += 1
+
+    # --- Reading back ---
+
+    def spilled_count(self, session_id, stream):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and stream in entry["spilled"]:
+                return entry["spilled"][stream]
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM spilled WHERE session_id = ? AND stream = ?",
+                (session_id, stream),
+            ).fetchone()
+            return row[0]
+
+    def load_recent(self, session_id, stream, count):
+        """The `count` most recently spilled items of a stream, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM spilled WHERE session_id = ? AND stream = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, stream, count),
+            ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    # --- Reporting ---
+
+    def report(self):
+        """One row per tracked session: in-memory bytes per stream and spilled item counts."""
+        now = time.time()
+        with self._lock:
+            budget = self._budget()
+            rows = []
+            for session_id, entry in self._sessions.items():
+                row = {"session": f"...{session_id[-6:]}", "idle_s": round(now - entry["last_seen"])}
+                row.update({f"{name}_kib": round(size / 1024, 1) for name, size in entry["bytes"].items()})
+                row["total_kib"] = round(sum(entry["bytes"].values()) / 1024, 1)
+                row["budget_kib"] = round(budget / 1024, 1)
+                row.update({f"{name}_spilled": count for name, count in entry["spilled"].items()})
+                rows.append(row)
+            return rows
+
+    def prune(self, older_than_seconds):
+        with self._lock:
+            self._conn.execute("DELETE FROM spilled WHERE spilled_at < ?", (time.time() - older_than_seconds,))
+            self._conn.commit()
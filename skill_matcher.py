@@ -0,0 +1,228 @@
+"""Deterministic job-description-to-CV skill matcher.
+
+Requirements are pulled out of a job description with a skill lexicon (no LLM
+call) and looked up in the CV's technical skills, project tech stacks and
+coursework. The result is an instant match breakdown for the UI and a compact
+evidence context for the cover letter prompt, instead of the whole CV.
+
+`python skill_matcher.py` checks REGRESSION_CASES.
+"""
+import json
+import re
+
+# canonical skill -> aliases, matched on word boundaries (case-insensitive, except for
+# one- or two-letter aliases like "C", "R", "AI" and "JS", which are written as they must appear)
+SKILL_LEXICON = {
+    "Python": ("python",),
+    "Java": ("java",),
+    "C++": ("c++", "cpp"),
+    "C": ("C",),
+    "C#": ("c#", ".net"),
+    "R": ("R",),
+    "SQL": ("sql", "mysql", "postgresql", "postgres", "databases", "database"),
+    "JavaScript": ("javascript", "JS", "node.js", "nodejs"),
+    "TypeScript": ("typescript",),
+    "Go": ("golang", "Go"),
+    "Rust": ("rust",),
+    "Kotlin": ("kotlin",),
+    "Assembly": ("assembly",),
+    "Object-Oriented Design": ("oop", "object-oriented", "object oriented"),
+    "System Architecture": ("system architecture", "software architecture", "system design"),
+    "Software Engineering": ("software engineering",),
+    "Machine Learning": ("machine learning", "ML", "ai/ml", "artificial intelligence", "AI"),
+    "Deep Learning": ("deep learning", "neural network", "neural networks", "cnn", "cnns"),
+    "Computer Vision": ("computer vision", "image classification"),
+    "Reinforcement Learning": ("reinforcement learning",),
+    "Clustering": ("clustering", "k-means", "unsupervised"),
+    "Statistics": ("statistics", "statistical", "probability", "data analysis"),
+    "NumPy": ("numpy",),
+    "LLMs / RAG": ("llm", "llms", "rag", "generative ai", "genai", "gemini", "openai"),
+    "IoT": ("iot", "internet of things", "sensor", "sensors"),
+    "Embedded Systems": ("embedded", "microcontroller", "microcontrollers", "esp8266", "firmware"),
+    "Real-time Systems": ("real-time", "realtime", "real time"),
+    "Cloud": ("cloud", "firebase", "backend", "serverless"),
+    "AWS": ("aws", "amazon web services"),
+    "Azure": ("azure",),
+    "GCP": ("gcp", "google cloud"),
+    "Docker": ("docker", "containers", "containerization"),
+    "Kubernetes": ("kubernetes", "k8s"),
+    "Linux": ("linux", "unix"),
+    "Git": ("git", "github", "gitlab"),
+    "CI/CD": ("ci/cd", "continuous integration", "devops"),
+    "REST APIs": ("rest api", "rest apis", "restful", "api", "apis"),
+    "WebSockets": ("websocket", "websockets"),
+    "Multi-threading": ("multi-threading", "multithreading", "concurrency", "asynchronous"),
+    "GUI Development": ("gui", "swing", "javafx", "frontend", "UI"),
+    "Streamlit": ("streamlit",),
+    "Simulation": ("simulation", "sumo"),
+}
+# A requirement in a sentence with one of these cues is a nice-to-have
+OPTIONAL_CUES = ("plus", "nice to have", "nice-to-have", "preferred", "bonus", "ideally", "desirable",
+                 "advantage", "von vorteil", "wünschenswert", "optional")
+OPTIONAL_WEIGHT = 0.5
+# Extra lookaheads for aliases that are also ordinary words: "go-to", "Go to market", "go ahead"
+ALIAS_GUARDS = {
+    "Go": r"(?!-|\s+(?:to|ahead|live|beyond|further)\b)",
+}
+# (job description, skills expected from skills_in); phrases that were once misread
+REGRESSION_CASES = (
+    ("Experience in AI and ML", {"Machine Learning"}),
+    ("Strong UI skills, JS developer", {"GUI Development", "JavaScript"}),
+    ("Report to the C-Level, join our R&D team", set()),
+    ("Backend engineer: 3+ years of Go, Kubernetes.", {"Go", "Kubernetes", "Cloud"}),
+    ("Our go-to stack. Go to market fast. Go ahead and apply.", set()),
+)
+
+
+def _alias_pattern(alias):
+    flags = 0 if len(alias) <= 2 else re.IGNORECASE
+    # A single letter next to "&" or "-" is an abbreviation ("R&D", "C-Level"), not a language
+    joined = "&-" if len(alias) == 1 else ""
+    guard = ALIAS_GUARDS.get(alias, "")
+    return re.compile(rf"(?<![\w+#./{joined}]){re.escape(alias)}(?![\w+#{joined}]|\.\w){guard}", flags)
+
+
+LEXICON_PATTERNS = {
+    skill: [_alias_pattern(alias) for alias in aliases] for skill, aliases in SKILL_LEXICON.items()
+}
+
+
+def skills_in(text):
+    return {skill for skill, patterns in LEXICON_PATTERNS.items() if any(p.search(text) for p in patterns)}
+
+
+def _is_optional(text):
+    lowered = text.lower()
+    return any(cue in lowered for cue in OPTIONAL_CUES)
+
+
+def extract_requirements(job_desc):
+    """[(skill, required)] in order of first mention; required wins if a skill appears both ways.
+
+    A skill is a nice-to-have when its clause has an optional cue ("Docker a plus") or it
+    sits under a heading that has one ("Nice to have:" followed by a list).
+    """
+    requirements = {}
+    optional_section = False
+    for line in job_desc.splitlines():
+        heading, colon, rest = line.partition(":")
+        if colon and len(heading) <= 40 and not skills_in(heading):
+            optional_section = _is_optional(heading)
+            line = rest
+        for clause in re.split(r"[,;]|(?<=[.!?])\s+", line):
+            optional = optional_section or _is_optional(clause)
+            for skill in sorted(skills_in(clause), key=lambda s: _first_position(clause, s)):
+                requirements[skill] = requirements.get(skill, False) or not optional
+    return list(requirements.items())
+
+
+def _first_position(text, skill):
+    positions = [m.start() for p in LEXICON_PATTERNS[skill] for m in [p.search(text)] if m]
+    return min(positions) if positions else len(text)
+
+
+class SkillMatch:
+    def __init__(self, requirements, evidence, projects, always_context):
+        self.requirements = requirements  # [(skill, required)]
+        self.evidence = evidence  # skill -> [(source, text)]
+        self.projects = projects  # projects backing the most requirements, best first
+        self._always_context = always_context
+
+    @property
+    def matched(self):
+        return [(skill, required) for skill, required in self.requirements if self.evidence.get(skill)]
+
+    @property
+    def missing(self):
+        return [(skill, required) for skill, required in self.requirements if not self.evidence.get(skill)]
+
+    def score(self):
+        """Weighted share of the requirements the CV backs up (0-100), None if nothing was recognized."""
+        total = sum(1.0 if required else OPTIONAL_WEIGHT for _, required in self.requirements)
+        if not total:
+            return None
+        got = sum(1.0 if required else OPTIONAL_WEIGHT for _, required in self.matched)
+        return round(100 * got / total)
+
+    def breakdown(self):
+        return [
+            {"skill": skill, "required": required,
+             "evidence": [f"{source}: {text}" for source, text in self.evidence.get(skill, [])]}
+            for skill, required in self.requirements
+        ]
+
+    def context(self):
+        """Prompt context with only the matched evidence (empty when nothing matched)."""
+        if not self.matched:
+            return ""
+        lines = [self._always_context, "[matched_skills]"]
+        for skill, required in self.matched:
+            sources = "; ".join(text for _, text in self.evidence[skill])
+            lines.append(f"- {skill}{'' if required else ' (nice to have)'}: {sources}")
+        if self.projects:
+            lines.append("[relevant_projects]")
+            lines.extend(
+                json.dumps({k: v for k, v in project.items() if k != "link"}, ensure_ascii=False)
+                for project in self.projects
+            )
+        if self.missing:
+            lines.append("[not_in_cv]")
+            lines.append(", ".join(skill for skill, _ in self.missing))
+        return "\n".join(lines)
+
+
+class SkillMatcher:
+    """Indexes the CV's skill evidence once; match() runs in about a millisecond."""
+
+    def __init__(self, cv_data):
+        self.evidence = []  # (skills, source, text, project or None)
+        skills = cv_data.get("technical_skills", {})
+        for group, items in skills.items():
+            for item in items if isinstance(items, list) else [items]:
+                self._add(f"technical_skills.{group}", item)
+        for project in cv_data.get("projects", []):
+            self._add(f"project '{project.get('name', '')}'", project.get("tech_stack", ""), project)
+        grades = cv_data.get("education", {}).get("key_coursework_grades", {})
+        for course, grade in grades.items():
+            self._add("coursework", f"{course} (grade {grade})")
+
+        info = cv_data.get("personal_info", {})
+        education = cv_data.get("education", {})
+        self.always_context = "[candidate]\n" + json.dumps(
+            {"name": info.get("name"), "role": info.get("role"), "contact": info.get("contact"),
+             "degree": education.get("degree"), "university": education.get("university"),
+             "status": education.get("current_status")},
+            ensure_ascii=False,
+        )
+
+    def _add(self, source, text, project=None):
+        found = skills_in(text)
+        if project is not None:
+            # A project also counts for what its name shows ("IoT System"), not only its tech stack
+            found |= skills_in(project.get("name", ""))
+        if found:
+            self.evidence.append((found, source, text, project))
+
+    def match(self, job_desc, max_projects=2):
+        requirements = extract_requirements(job_desc)
+        weights = {skill: 1.0 if required else OPTIONAL_WEIGHT for skill, required in requirements}
+        evidence, ranked = {}, []
+        for skills, source, text, project in self.evidence:
+            hits = skills & weights.keys()
+            for skill in hits:
+                evidence.setdefault(skill, []).append((source, text))
+            if hits and project is not None:
+                ranked.append((-sum(weights[skill] for skill in hits), len(ranked), project))
+        projects = [project for _, _, project in sorted(ranked)[:max_projects]]
+        return SkillMatch(requirements, evidence, projects, self.always_context)
+
+
+if __name__ == "__main__":
+    failures = 0
+    for job_desc, expected in REGRESSION_CASES:
+        found = skills_in(job_desc)
+        if found != expected:
+            failures += 1
+            print(f"FAIL: {job_desc!r} -> {sorted(found)}, expected {sorted(expected)}")
+    print(f"{len(REGRESSION_CASES) - failures}/{len(REGRESSION_CASES)} skill lexicon cases pass")
+    raise SystemExit(1 if failures else 0)
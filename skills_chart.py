@@ -0,0 +1,111 @@
+"""The sidebar's skill radar chart, as an interactive Plotly figure or a static SVG.
+
+The SVG is drawn without pandas or Plotly and cached on disk under a name
+derived from the chart data, so pages can render it on a fresh container
+without importing either library. Build it ahead of time with:
+
+    python skills_chart.py
+"""
+import hashlib
+import html
+import json
+import math
+import os
+
+# Self-assessed scores (1-10), derived from 'technical_skills'
+SKILL_PROFICIENCY = {
+    'System Architecture': 7,
+    'Java (OOP/GUI)': 9,
+    'C++(OOP)': 8,
+    'Python (AI Math/Logic)': 8,
+    'IoT/Embedded': 7,
+    'Cloud/Backend': 7,
+}
+CHART_TITLE = "Technical Balance: Architect vs. Coder"
+LINE_COLOR = '#4CAF50'
+MAX_SCORE = 10
+STATIC_CHART_DIR = ".cache"
+
+
+def build_figure(skills=None, title=CHART_TITLE):
+    """Interactive Plotly radar chart. pandas / Plotly Express are imported only here."""
+    import pandas as pd
+    import plotly.express as px
+
+    skills = skills or SKILL_PROFICIENCY
+    data = pd.DataFrame({'Skill': list(skills), 'Proficiency': list(skills.values())})
+
+    fig = px.line_polar(data, r='Proficiency', theta='Skill', line_close=True)
+    fig.update_traces(fill='toself', line_color=LINE_COLOR)
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, MAX_SCORE])),
+        showlegend=False,
+        title=title
+    )
+    return fig
+
+
+def render_svg(skills=None, title=CHART_TITLE, size=420):
+    """Same chart as build_figure, drawn as a standalone SVG string."""
+    skills = skills or SKILL_PROFICIENCY
+    labels = list(skills)
+    center_x, center_y = size / 2, size / 2 + 20
+    radius = size * 0.3
+
+    def point(index, value):
+        # First axis points straight up, then clockwise like Plotly's default
+        angle = math.pi / 2 - 2 * math.pi * index / len(labels)
+        r = radius * value / MAX_SCORE
+        return center_x + r * math.cos(angle), center_y - r * math.sin(angle)
+
+    def polygon(values):
+        return " ".join(f"{x:.1f},{y:.1f}" for x, y in (point(i, v) for i, v in enumerate(values)))
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size + 30}" '
+        f'font-family="sans-serif" font-size="11">',
+        f'<text x="10" y="20" font-size="15" fill="#444">{html.escape(title)}</text>',
+    ]
+    for level in range(2, MAX_SCORE + 1, 2):
+        parts.append(f'<polygon points="{polygon([level] * len(labels))}" fill="none" stroke="#ddd"/>')
+    for i, label in enumerate(labels):
+        x, y = point(i, MAX_SCORE)
+        lx, ly = point(i, MAX_SCORE * 1.18)
+        anchor = "middle" if abs(lx - center_x) < 5 else ("start" if lx > center_x else "end")
+        parts.append(f'<line x1="{center_x:.1f}" y1="{center_y:.1f}" x2="{x:.1f}" y2="{y:.1f}" stroke="#ddd"/>')
+        parts.append(f'<text x="{lx:.1f}" y="{ly + 4:.1f}" text-anchor="{anchor}" fill="#444">{html.escape(label)}</text>')
+    parts.append(
+        f'<polygon points="{polygon(skills.values())}" fill="{LINE_COLOR}" fill-opacity="0.5" '
+        f'stroke="{LINE_COLOR}" stroke-width="2"/>'
+    )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def static_chart_path(skills=None, title=CHART_TITLE, directory=STATIC_CHART_DIR):
+    digest = hashlib.sha256(json.dumps([skills or SKILL_PROFICIENCY, title]).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(directory, f"skills_chart_{digest}.svg")
+
+
+def load_static_chart(skills=None, title=CHART_TITLE, directory=STATIC_CHART_DIR):
+    """Returns the SVG from disk, rendering and saving it first if this data version is missing."""
+    path = static_chart_path(skills, title, directory)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    svg = render_svg(skills, title)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(svg)
+    except OSError as e:
+        print(f"Static chart could not be saved: {e}")
+    return svg
+
+
+if __name__ == "__main__":
+    load_static_chart()
+    print(static_chart_path())
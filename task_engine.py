@@ -0,0 +1,221 @@
+"""Background execution of model calls for the Streamlit script thread.
+
+Work that calls a model (a Council round, a Standard Mode answer, a cover
+letter) is submitted as a Task and runs on a process-wide worker pool, so a
+script run only submits and then polls: the page stays responsive and tasks
+from different tabs of one session run side by side. Each session has at most
+one task per slot (e.g. one per tab); submitting a new one cancels the old
+one. Tasks whose session has stopped polling for abandon_seconds are
+cancelled too, so a closed tab does not keep spending quota.
+
+Cancellation is cooperative: code running inside a task checks
+current_cancel() (the gateway does so before every attempt and the task
+itself between streamed chunks). A request already on the wire cannot be
+interrupted; its answer is dropped.
+"""
+import itertools
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+
+_current = ContextVar("current_task", default=None)
+
+
+def current_task():
+    """The Task whose code is running on this thread (or a thread it copied its context to), else None."""
+    return _current.get()
+
+
+def current_cancel():
+    """threading.Event set when the current task is cancelled, None outside a task."""
+    task = _current.get()
+    return task.cancel_event if task else None
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+    """One unit of background work plus the progress the UI renders while it runs."""
+
+    def __init__(self, task_id, session_id, slot, label=""):
+        self.id = task_id
+        self.session_id = session_id
+        self.slot = slot
+        self.label = label
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.cancel_reason = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.queue_position = None  # set while one of its model calls waits for admission
+        self._steps = []
+        self._partial = []
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def step(self, text):
+        """Adds a line to the progress log (shown like the old st.status steps)."""
+        with self._lock:
+            self._steps.append(text)
+
+    def stream(self, text):
+        """Appends streamed answer text for the UI to show before the task is done."""
+        with self._lock:
+            self._partial.append(text)
+
+    def set_queue_position(self, position):
+        self.queue_position = position
+
+    def check(self):
+        """Raises TaskCancelled once the task was cancelled; call between steps."""
+        if self.cancel_event.is_set():
+            raise TaskCancelled(self.cancel_reason or "cancelled")
+
+    def progress(self):
+        """(steps, partial text) so far."""
+        with self._lock:
+            return list(self._steps), "".join(self._partial)
+
+    def cancel(self, reason="cancelled"):
+        """Asks the task to stop. Returns True if it had not started and is finished right away."""
+        if self.finished:
+            return False
+        self.cancel_reason = self.cancel_reason or reason
+        self.cancel_event.set()
+        if self.future is not None and self.future.cancel():
+            self._finish(CANCELLED)
+            return True
+        return False
+
+    def _finish(self, status, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self.status = status
+
+
+class TaskEngine:
+    """Process-wide worker pool with per-session task slots, shared by every session."""
+
+    def __init__(self, workers=16, abandon_seconds=90, reap_interval=5.0):
+        self.abandon_seconds = abandon_seconds
+        self.counters = Counter()
+        self._tasks = {}  # (session_id, slot) -> Task
+        self._seen = {}  # session_id -> time.monotonic() of the last script or poll run
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="task")
+        threading.Thread(target=self._reap_loop, args=(reap_interval,), daemon=True, name="task-reaper").start()
+
+    def submit(self, session_id, slot, fn, *args, label=""):
+        """Runs fn(*args) in the background as the session's task for slot.
+
+        A task still running in that slot is cancelled first (the user asked again).
+        """
+        task = Task(next(self._ids), session_id, slot, label)
+        with self._lock:
+            previous = self._tasks.get((session_id, slot))
+            self._tasks[(session_id, slot)] = task
+            self._seen[session_id] = time.monotonic()
+            self.counters["submitted"] += 1
+        if previous is not None:
+            self._cancel(previous, "superseded")
+        task.future = self._pool.submit(self._run, task, fn, args)
+        return task
+
+    def _run(self, task, fn, args):
+        if task.cancelled:
+            task._finish(CANCELLED)
+            self._count(CANCELLED)
+            return
+        task.status = RUNNING
+        token = _current.set(task)
+        try:
+            result = fn(*args)
+        except TaskCancelled:
+            task._finish(CANCELLED)
+        except Exception as e:
+            print(f"Task {task.slot} #{task.id} failed: {e}")
+            task._finish(FAILED, error=str(e))
+        else:
+            # An answer that lands after a cancel is dropped
+            task._finish(CANCELLED if task.cancelled else DONE, result=result)
+        finally:
+            _current.reset(token)
+        self._count(task.status)
+
+    def _count(self, status):
+        with self._lock:
+            self.counters[status] += 1
+
+    def _cancel(self, task, reason):
+        if task.cancel(reason):
+            self._count(CANCELLED)
+
+    def touch(self, session_id):
+        """Marks the session as alive; every script and poll run of the session calls this."""
+        with self._lock:
+            self._seen[session_id] = time.monotonic()
+
+    def get(self, session_id, slot):
+        with self._lock:
+            return self._tasks.get((session_id, slot))
+
+    def take(self, session_id, slot):
+        """Removes and returns the slot's task if it has finished, so its result is applied once."""
+        with self._lock:
+            task = self._tasks.get((session_id, slot))
+            if task is None or not task.finished:
+                return None
+            del self._tasks[(session_id, slot)]
+            return task
+
+    def cancel(self, session_id, slot=None, reason="stopped by the user"):
+        with self._lock:
+            tasks = [t for (sid, s), t in self._tasks.items() if sid == session_id and (slot is None or s == slot)]
+        for task in tasks:
+            self._cancel(task, reason)
+
+    def _reap_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            self.reap()
+
+    def reap(self):
+        """Cancels the tasks of sessions that stopped polling; drops results nobody collected."""
+        cutoff = time.monotonic() - self.abandon_seconds
+        with self._lock:
+            gone = {sid for sid, seen in self._seen.items() if seen < cutoff}
+            abandoned = [t for (sid, _), t in self._tasks.items() if sid in gone]
+            for key in [k for k, t in self._tasks.items() if k[0] in gone and t.finished]:
+                del self._tasks[key]
+            for sid in gone - {t.session_id for t in self._tasks.values()}:
+                del self._seen[sid]
+        for task in abandoned:
+            if not task.finished:
+                self._count("abandoned")
+                self._cancel(task, "session left")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["running"] = sum(1 for t in self._tasks.values() if t.status == RUNNING)
+            stats["queued"] = sum(1 for t in self._tasks.values() if t.status == PENDING)
+            stats["sessions"] = len(self._seen)
+        return stats
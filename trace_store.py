@@ -0,0 +1,94 @@
+"""Decision-trace storage for Council Mode.
+
+Each session keeps its most recent traces in a ring buffer (a bounded deque
+in session_state). TraceStore optionally persists every trace to a local
+SQLite file, indexed by session and time, so older traces can be paged and
+queried without being held in memory.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+def new_trace_log(max_entries, entries=()):
+    """Ring buffer for one session's traces (oldest dropped first)."""
+    return deque(entries, maxlen=max_entries)
+
+
+def page_of(entries, page, page_size):
+    """Newest-first slice of an in-memory trace log for a 1-based page number."""
+    newest_first = list(reversed(entries))
+    start = (page - 1) * page_size
+    return newest_first[start:start + page_size]
+
+
+class TraceStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS traces ("
+            "session_id TEXT NOT NULL, trace_id INTEGER NOT NULL, created_at REAL NOT NULL, "
+            "query TEXT NOT NULL, payload TEXT NOT NULL, PRIMARY KEY (session_id, trace_id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_traces_session_time ON traces(session_id, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_traces_time ON traces(created_at)")
+        self._conn.commit()
+
+    def add(self, session_id, log):
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO traces (session_id, trace_id, created_at, query, payload) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (session_id, log["id"], log.get("created_at", time.time()), log["query"], json.dumps(log)),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Trace write failed: {e}")
+
+    def count(self, session_id):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM traces WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def page(self, session_id, page, page_size):
+        """Newest-first traces of one session for a 1-based page number."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM traces WHERE session_id = ? ORDER BY trace_id DESC LIMIT ? OFFSET ?",
+                (session_id, page_size, (page - 1) * page_size),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def query(self, session_id=None, since=None, until=None, text=None, limit=50):
+        """Traces matching every given filter, newest first (text matches the question)."""
+        clauses, params = [], []
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if text:
+            clauses.append("query LIKE ?")
+            params.append(f"%{text}%")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT payload FROM traces {where} ORDER BY created_at DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def prune(self, older_than_seconds):
+        with self._lock:
+            self._conn.execute("DELETE FROM traces WHERE created_at < ?", (time.time() - older_than_seconds,))
+            self._conn.commit()